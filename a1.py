@@ -8,11 +8,706 @@ __author__ = "Alex White"
 __email__ = "s4321830@student.uq.edu.au"
 __date__ = "16/03/2023"
 
+import csv
+import heapq
+import json
+import runpy
+import sys
+from array import array
+from functools import lru_cache
 from constants import *
+from render import render_table
+from shopping_list import INGREDIENTS, MEASURES
+from trigram_index import TrigramIndex
+from units import normalise, to_display_unit
+
+if __name__ == '__main__':
+    # The command loop is in session.py, which imports this file as a1.
+    # Hand over before defining anything, so the program only ever has the
+    # one copy of these functions and classes, the a1 module's.
+    runpy.run_module('session', run_name='__main__', alter_sys=True)
+    sys.exit()
+
+# Number of distinct recipe strings whose parsed ingredients are kept
+RECIPE_CACHE_SIZE = 4096
+
+# Number of recipes added to the cook book at a time by import_recipes
+IMPORT_BATCH_SIZE = 1000
+
+# Number of malformed lines import_recipes keeps the details of
+IMPORT_MAX_ERRORS = 100
+
+# Totals at or below this are treated as nothing left to buy, so that
+# floating point leftovers of adding then removing a recipe are dropped
+AMOUNT_TOLERANCE = 1e-9
+
+# Recipes the cook book starts with. constants.py in this directory holds
+# the constants of assignment 2, so they are defined here. Each ingredient
+# has the same measure in every recipe, as IngredientAggregate assumes.
+CHOCOLATE_PEANUT_BUTTER_SHAKE = ('chocolate peanut butter shake',
+                                 '1 large banana,2 tbsp peanut butter,'
+                                 '20 g cocoa powder,250 ml almond milk,'
+                                 '1 tbsp maple syrup')
+BROWNIE = ('brownie', '1.5 cup flour,200 g sugar,40 g cocoa powder,'
+                      '1 tsp baking powder,0.5 tsp salt,115 g Nuttelex,'
+                      '180 ml almond milk,1 tsp vanilla extract')
+SEITAN = ('seitan', '150 g vital wheat gluten,2 tbsp nutritional yeast,'
+                    '1 tsp garlic powder,180 ml vegetable stock,'
+                    '2 tbsp soy sauce,1 tbsp tomato paste')
+CINNAMON_ROLLS = ('cinnamon rolls', '480 ml almond milk,115 g Nuttelex,'
+                                    '50 g sugar,7 g active dry yeast,'
+                                    '5.5 cup flour,1 tsp salt,'
+                                    '170 g Nuttelex,165 g brown sugar,'
+                                    '2 tbsp cinnamon,160 g powdered sugar,'
+                                    '30 ml almond milk,'
+                                    '0.5 tsp vanilla extract')
+PEANUT_BUTTER = ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')
+MUNG_BEAN_OMELETTE = ('mung bean omelette', '1 cup mung bean,'
+                                            '0.75 tsp pink salt,'
+                                            '0.25 tsp garlic powder,'
+                                            '0.25 tsp onion powder,'
+                                            '0.125 tsp pepper,'
+                                            '0.25 tsp turmeric,'
+                                            '1 cup soy milk,0.5 tsp salt,'
+                                            '1 tsp oil')
+
+DEFAULT_RECIPES = [
+    CHOCOLATE_PEANUT_BUTTER_SHAKE,
+    BROWNIE,
+    SEITAN,
+    CINNAMON_ROLLS,
+    PEANUT_BUTTER,
+    MUNG_BEAN_OMELETTE,
+]
 
 
 # Write your functions here
 
+class IngredientAggregate():
+    """Running totals of ingredients, keyed by ingredient name.
+
+    Adding an ingredient is a single dictionary update, so a whole shopping
+    list can be built in one pass over the ingredients. The totals are only
+    turned into the list[tuple[float, str, str]] shopping list format when
+    to_list is called. As with add_to_shopping_list, the measure is assumed
+    to be consistent for all ingredients of the same name, so the first
+    measure seen for a name is kept.
+
+    With convert_units, amounts are instead converted to the canonical unit
+    of their measure (see units.py) as they are added, so 1 kg and 500 g of
+    flour total 1500 g, and to_list shows each total in a sensible unit.
+    An ingredient measured in two incompatible ways (e.g. 'large' and 'g')
+    is kept as two rows rather than summed.
+
+    Attributes:
+        _convert_units: whether amounts are converted to canonical units
+        _amounts: a dictionary of key to total amount, in the order the
+            ingredients were first added. The key is the ingredient name,
+            or (name, measure) for a second, incompatible measure of a name
+        _measures: a dictionary of key to measure
+    """
+
+    def __init__(self, convert_units: bool = False) -> None:
+        """Initialises an empty aggregate.
+
+        Args:
+            convert_units: whether to convert amounts to canonical units
+
+        Returns:
+            None
+        """
+        self._convert_units = convert_units
+        self._amounts = {}
+        self._measures = {}
+
+    def add(self, ingredient_details: tuple[float, str, str],
+            scale: float = 1.0) -> None:
+        """Adds an (amount, measure, ingredient) tuple to the totals.
+
+        Args:
+            ingredient_details: the ingredient to add
+            scale: how many times to add the ingredient
+
+        Examples:
+            >>> aggregate = IngredientAggregate()
+            >>> aggregate.add((300.0, 'g', 'peanuts'))
+            >>> aggregate.add((200.0, 'g', 'peanuts'))
+            >>> aggregate.to_list()
+            [(500.0, 'g', 'peanuts')]
+        """
+        key, amount, measure = self._get_key(ingredient_details)
+        amounts = self._amounts
+        if key in amounts:
+            amounts[key] += amount * scale
+        else:
+            amounts[key] = amount * scale
+            self._measures[key] = measure
+
+    def subtract(self, ingredient_details: tuple[float, str, str],
+                 scale: float = 1.0) -> None:
+        """Takes an (amount, measure, ingredient) tuple away from the totals.
+
+        An ingredient that is not in the totals, or is in a different
+        measure that can not be converted, is ignored. One with nothing left
+        is removed from the totals.
+
+        Examples:
+            >>> aggregate = IngredientAggregate()
+            >>> aggregate.add((300.0, 'g', 'peanuts'))
+            >>> aggregate.subtract((100.0, 'g', 'peanuts'))
+            >>> aggregate.to_list()
+            [(200.0, 'g', 'peanuts')]
+            >>> aggregate.subtract((200.0, 'g', 'peanuts'))
+            >>> aggregate.to_list()
+            []
+            >>> aggregate = IngredientAggregate(convert_units=True)
+            >>> aggregate.add((2.0, 'large', 'egg'))
+            >>> aggregate.add((100.0, 'g', 'egg'))
+            >>> aggregate.subtract((2.0, 'large', 'egg'))
+            >>> aggregate.add((50.0, 'g', 'egg'))
+            >>> aggregate.to_list()
+            [(150.0, 'g', 'egg')]
+        """
+        key, amount, measure = self._get_key(ingredient_details)
+        amounts = self._amounts
+        if key not in amounts or self._measures[key] != measure:
+            return
+        amounts[key] -= amount * scale
+        if amounts[key] <= AMOUNT_TOLERANCE:
+            del amounts[key]
+            del self._measures[key]
+
+    def _get_key(self, ingredient_details: tuple[float, str, str]
+                 ) -> tuple[str | tuple[str, str], float, str]:
+        """Returns the key an ingredient is totalled under, and its amount
+        and measure converted to canonical units if needed.
+        """
+        amount, measure, name = ingredient_details
+        key = name
+        if self._convert_units:
+            amount, measure = normalise(amount, measure)
+            # a second measure keeps its own row even once the first
+            # measure's row has been used up
+            if self._measures.get(name, measure) != measure \
+                    or (name, measure) in self._measures:
+                key = (name, measure)
+        return key, amount, measure
+
+    def add_all(self, ingredients, scale: float = 1.0) -> None:
+        """Adds every (amount, measure, ingredient) tuple in ingredients."""
+        for ingredient_details in ingredients:
+            self.add(ingredient_details, scale)
+
+    def add_recipe(self, recipe: tuple[str, str], scale: float = 1.0) -> None:
+        """Adds all of the ingredients of a recipe to the totals."""
+        self.add_all(recipe_ingredients(recipe), scale)
+
+    def remove_recipe(self, recipe: tuple[str, str],
+                      scale: float = 1.0) -> None:
+        """Takes all of the ingredients of a recipe away from the totals."""
+        for ingredient_details in recipe_ingredients(recipe):
+            self.subtract(ingredient_details, scale)
+
+    def copy(self) -> 'IngredientAggregate':
+        """Returns a copy of the aggregate that can be changed separately."""
+        result = IngredientAggregate(self._convert_units)
+        result._amounts = dict(self._amounts)
+        result._measures = dict(self._measures)
+        return result
+
+    def merge(self, other: 'IngredientAggregate') -> None:
+        """Adds all of the totals of another aggregate to this one."""
+        for key, amount in other._amounts.items():
+            name = key if isinstance(key, str) else key[0]
+            self.add((amount, other._measures[key], name))
+
+    def get_amount(self, name: str) -> tuple[float, str] | None:
+        """Returns the (amount, measure) total of an ingredient, or None if
+        the ingredient has not been added.
+        """
+        if name not in self._amounts:
+            return None
+        return (self._amounts[name], self._measures[name])
+
+    def to_list(self) -> list[tuple[float, str, str]]:
+        """Returns the totals in the shopping list format, in the order the
+        ingredients were first added.
+        """
+        measures = self._measures
+        shopping_list = []
+        for key, amount in self._amounts.items():
+            name = key if isinstance(key, str) else key[0]
+            measure = measures[key]
+            if self._convert_units:
+                amount, measure = to_display_unit(amount, measure)
+            shopping_list.append((amount, measure, name))
+        return shopping_list
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._amounts
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.to_list()!r})'
+
+
+class IngredientIndex():
+    """An inverted index from ingredient name to the names of the recipes
+    that use it.
+
+    Answers "which recipes use X" with one dictionary lookup, and "which
+    recipes use X and Y" by intersecting the recipe sets, smallest first.
+
+    Attributes:
+        _recipes: a dictionary of ingredient name to a set of recipe names
+        _ingredients: a dictionary of recipe name to the set of its
+            ingredient names
+    """
+
+    def __init__(self, recipes: list[tuple[str, str]] | None = None) -> None:
+        """Initialises the index with the given recipes, if any.
+
+        Args:
+            recipes: recipes to index
+
+        Returns:
+            None
+        """
+        self._recipes = {}
+        self._ingredients = {}
+        if recipes is not None:
+            for recipe in recipes:
+                self.add_recipe(recipe)
+
+    def add_recipe(self, recipe: tuple[str, str]) -> None:
+        """Indexes a recipe, replacing any recipe of the same name.
+
+        Ingredients that can not be parsed are left out of the index.
+        """
+        name = recipe[0]
+        if name in self._ingredients:
+            self.remove_recipe(name)
+        if isinstance(recipe, Recipe):
+            # read from the codes, so the recipe is not formatted as a string
+            ingredients = set(recipe.get_ingredient_names())
+        else:
+            ingredients = set()
+            for raw_ingredient in recipe[1].split(','):
+                try:
+                    ingredients.add(parse_ingredient(raw_ingredient)[2])
+                except (ValueError, IndexError):
+                    pass
+        self._ingredients[name] = ingredients
+        for ingredient in ingredients:
+            self._recipes.setdefault(ingredient, set()).add(name)
+
+    def remove_recipe(self, name: str) -> None:
+        """Removes the recipe with the given name from the index, if it is
+        indexed.
+        """
+        for ingredient in self._ingredients.pop(name, ()):
+            recipe_names = self._recipes[ingredient]
+            recipe_names.discard(name)
+            if not recipe_names:
+                del self._recipes[ingredient]
+
+    def uses(self, recipe_name: str, ingredient: str) -> bool:
+        """Returns True iff the named recipe uses the ingredient."""
+        return ingredient in self._ingredients.get(recipe_name, ())
+
+    def recipes_with(self, ingredient: str) -> set[str]:
+        """Returns the names of the recipes that use an ingredient.
+
+        Examples:
+            >>> index = IngredientIndex([('peanut butter',
+            ... '300 g peanuts,0.5 tsp salt'), ('brittle', '200 g peanuts')])
+            >>> sorted(index.recipes_with('peanuts'))
+            ['brittle', 'peanut butter']
+        """
+        return set(self._recipes.get(ingredient, ()))
+
+    def recipes_with_all(self, ingredients: list[str]) -> set[str]:
+        """Returns the names of the recipes that use every one of the
+        ingredients.
+        """
+        recipe_sets = sorted((self._recipes.get(x, set()) for x in ingredients),
+                             key=len)
+        if not recipe_sets:
+            return set()
+        return set(recipe_sets[0]).intersection(*recipe_sets[1:])
+
+    def recipes_with_any(self, ingredients: list[str]) -> set[str]:
+        """Returns the names of the recipes that use at least one of the
+        ingredients.
+        """
+        return set().union(*(self._recipes.get(x, ()) for x in ingredients))
+
+    def cook_from_pantry(self, pantry: list[str], limit: int = 10
+                         ) -> list[tuple[str, int, int]]:
+        """Returns the recipes that make the most use of the pantry.
+
+        Recipes are ranked by how many of the pantry ingredients they use,
+        then by how few other ingredients they need. Only recipes using at
+        least one pantry ingredient are included.
+
+        Returns:
+            Up to limit (recipe name, pantry ingredients used, ingredients
+            missing) tuples, best first.
+
+        Examples:
+            >>> index = IngredientIndex([('peanut butter',
+            ... '300 g peanuts,0.5 tsp salt,2 tsp oil'),
+            ... ('salted peanuts', '200 g peanuts,1 tsp salt')])
+            >>> index.cook_from_pantry(['peanuts', 'salt'])
+            [('salted peanuts', 2, 0), ('peanut butter', 2, 1)]
+        """
+        used = {}
+        for ingredient in set(pantry):
+            for recipe_name in self._recipes.get(ingredient, ()):
+                used[recipe_name] = used.get(recipe_name, 0) + 1
+        ingredients = self._ingredients
+        ranked = heapq.nsmallest(limit, used.items(), key=lambda x: (
+            -x[1], len(ingredients[x[0]]) - x[1], x[0]))
+        return [(name, count, len(ingredients[name]) - count)
+                for name, count in ranked]
+
+    def get_ingredients(self) -> list[str]:
+        """Returns the names of every indexed ingredient."""
+        return list(self._recipes)
+
+    def __len__(self) -> int:
+        return len(self._ingredients)
+
+
+class Cookbook():
+    """A collection of recipes indexed by recipe name.
+
+    Behaves like the list[tuple[str, str]] of recipes used elsewhere in this
+    file (iteration, len, append, remove) so it can be passed to the same
+    functions, but lookups, adds and removes by name are O(1).
+    Recipes are held as Recipes, so their ingredients are stored as codes
+    rather than strings; a recipe whose ingredients can not be parsed is
+    kept as it was given. Recipes are kept in the order they were added. Adding a recipe with a
+    name that already exists replaces the old recipe. An IngredientIndex of
+    the recipes is kept up to date as recipes are added and removed, as is
+    a TrigramIndex of the names once get_name_index has been called.
+
+    Attributes:
+        _recipes: a dictionary of recipe name to Recipe, in insertion order
+        _index: an IngredientIndex of the recipes
+        _name_index: a TrigramIndex of the recipe names, or None if it has
+            not been built yet
+    """
+
+    def __init__(self, recipes: list[tuple[str, str]] | None = None) -> None:
+        """Initialises the cookbook with the given recipes, if any.
+
+        Args:
+            recipes: recipes to add to the cookbook, in order
+
+        Returns:
+            None
+        """
+        self._recipes = {}
+        self._index = IngredientIndex()
+        self._name_index = None
+        if recipes is not None:
+            self.extend(recipes)
+
+    def get_recipe(self, name: str) -> tuple[str, str] | None:
+        """Returns the recipe with the given name, or None if it is not
+        in the cookbook.
+
+        Examples:
+            >>> cookbook = Cookbook([('peanut butter', '300 g peanuts')])
+            >>> cookbook.get_recipe('peanut butter')
+            Recipe.from_tuple(('peanut butter', '300 g peanuts'))
+            >>> cookbook.get_recipe('peanut butter') == ('peanut butter',
+            ... '300 g peanuts')
+            True
+            >>> print(cookbook.get_recipe('brownie'))
+            None
+        """
+        return self._recipes.get(name)
+
+    def get_names(self) -> list[str]:
+        """Returns the names of all recipes in the cookbook, in order."""
+        return list(self._recipes)
+
+    def get_index(self) -> IngredientIndex:
+        """Returns the ingredient index of the recipes in the cookbook."""
+        return self._index
+
+    def get_name_index(self) -> TrigramIndex:
+        """Returns a TrigramIndex of the recipe names, for finding the
+        closest names to a misspelt one. It is built on the first call.
+        """
+        if self._name_index is None:
+            self._name_index = TrigramIndex(self._recipes)
+        return self._name_index
+
+    def append(self, recipe: tuple[str, str]) -> None:
+        """Adds a recipe to the end of the cookbook.
+
+        If a recipe with the same name exists it is replaced in place.
+        """
+        if not isinstance(recipe, Recipe):
+            try:
+                recipe = Recipe.from_tuple(recipe)
+            except (ValueError, IndexError):
+                pass
+        self._recipes[recipe[0]] = recipe
+        self._index.add_recipe(recipe)
+        if self._name_index is not None:
+            self._name_index.add(recipe[0])
+
+    def extend(self, recipes: list[tuple[str, str]]) -> None:
+        """Adds each of the given recipes to the cookbook."""
+        for recipe in recipes:
+            self.append(recipe)
+
+    def remove_name(self, name: str) -> tuple[str, str] | None:
+        """Removes the recipe with the given name and returns it.
+
+        Nothing happens if there is no recipe with that name.
+
+        Returns:
+            The removed recipe, or None if it was not in the cookbook.
+        """
+        self._index.remove_recipe(name)
+        if self._name_index is not None:
+            self._name_index.remove(name)
+        return self._recipes.pop(name, None)
+
+    def remove(self, recipe: tuple[str, str]) -> None:
+        """Removes the given recipe, like list.remove.
+
+        Raises:
+            ValueError: if the recipe is not in the cookbook.
+        """
+        if self._recipes.get(recipe[0]) != recipe:
+            raise ValueError(f'{recipe!r} is not in the cookbook')
+        self.remove_name(recipe[0])
+
+    def __contains__(self, item: str | tuple[str, str]) -> bool:
+        if isinstance(item, str):
+            return item in self._recipes
+        return self._recipes.get(item[0]) == item
+
+    def __iter__(self):
+        return iter(self._recipes.values())
+
+    def __len__(self) -> int:
+        return len(self._recipes)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Cookbook):
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+
+class Ingredient():
+    """An amount of an ingredient, parsed once and held as numbers.
+
+    Unpacks like the (amount, measure, ingredient) tuple returned by
+    parse_ingredient.
+
+    Attributes:
+        amount: how much of the ingredient, as a float
+        measure: the measure of the amount, e.g. 'g'
+        name: the name of the ingredient
+    """
+    __slots__ = ('amount', 'measure', 'name')
+
+    def __init__(self, amount: float, measure: str, name: str) -> None:
+        """Initialises the ingredient.
+
+        Returns:
+            None
+        """
+        self.amount = amount
+        self.measure = measure
+        self.name = name
+
+    @classmethod
+    def from_string(cls, raw_ingredient_detail: str) -> 'Ingredient':
+        """Returns the Ingredient of a string such as '0.5 tsp salt'."""
+        return cls(*parse_ingredient(raw_ingredient_detail))
+
+    def to_tuple(self) -> tuple[float, str, str]:
+        """Returns the ingredient in the parse_ingredient tuple format."""
+        return (self.amount, self.measure, self.name)
+
+    def __iter__(self):
+        return iter((self.amount, self.measure, self.name))
+
+    def __str__(self) -> str:
+        return f'{format_amount(self.amount)} {self.measure} {self.name}'
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Ingredient):
+            return self.to_tuple() == other.to_tuple()
+        if isinstance(other, tuple):
+            return self.to_tuple() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.to_tuple())
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}({self.amount!r}, '
+                f'{self.measure!r}, {self.name!r})')
+
+
+class Recipe():
+    """A recipe whose ingredients are parsed once, when it is created.
+
+    Can be used anywhere a (name, ingredients) recipe tuple is expected:
+    recipe[0] is the name and recipe[1] the comma separated ingredient
+    string, and recipe_ingredients returns the parsed ingredients without
+    parsing them again. The ingredients are held as an array of amounts and
+    an array of measure and ingredient codes into shopping_list.MEASURES and
+    INGREDIENTS, rather than as objects and strings.
+
+    The tuple form, its hash and the parsed ingredient tuples are built the
+    first time they are asked for and then kept, so a Recipe used many
+    times in a meal plan is only formatted once. Recipes are not changed
+    after they are created.
+
+    Attributes:
+        name: the name of the recipe
+        _amounts: a float64 array of the ingredient amounts
+        _codes: an integer array of the measure code then the ingredient
+            code of each ingredient
+        _tuple: the (name, ingredients) tuple, or None until it is needed
+        _hash: the hash of _tuple, or None until it is needed
+        _ingredient_tuples: the ingredients in the recipe_ingredients
+            format, or None until they are needed
+    """
+    __slots__ = ('name', '_amounts', '_codes', '_tuple', '_hash',
+                 '_ingredient_tuples')
+
+    def __init__(self, name: str, ingredients: tuple[Ingredient, ...]) -> None:
+        """Initialises the recipe.
+
+        Args:
+            ingredients: Ingredients or (amount, measure, ingredient) tuples
+
+        Returns:
+            None
+        """
+        self.name = name
+        self._amounts = array('d')
+        self._codes = array('l')
+        self._tuple = None
+        self._hash = None
+        self._ingredient_tuples = None
+        for amount, measure, ingredient in ingredients:
+            self._amounts.append(amount)
+            self._codes.append(MEASURES.get_code(measure))
+            self._codes.append(INGREDIENTS.get_code(ingredient))
+
+    @classmethod
+    def from_tuple(cls, recipe: tuple[str, str]) -> 'Recipe':
+        """Returns the Recipe of a (name, ingredients) recipe tuple.
+
+        Examples:
+            >>> recipe = Recipe.from_tuple(('peanut butter',
+            ... '300 g peanuts,0.5 tsp salt'))
+            >>> recipe.ingredients[1].amount
+            0.5
+            >>> recipe.to_tuple()
+            ('peanut butter', '300 g peanuts,0.5 tsp salt')
+            >>> recipe == recipe.to_tuple()
+            True
+            >>> count_recipes([recipe, recipe.to_tuple()])[0][1]
+            2
+        """
+        return cls(recipe[0], (parse_ingredient(x)
+                               for x in recipe[1].split(',')))
+
+    @property
+    def ingredients(self) -> tuple[Ingredient, ...]:
+        """The recipe's Ingredients."""
+        return tuple(Ingredient(*x) for x in self.get_ingredient_tuples())
+
+    def get_ingredient_codes(self) -> tuple[array, array, array]:
+        """Returns the amounts, measure codes and ingredient codes of the
+        ingredients, as three arrays.
+        """
+        return self._amounts, self._codes[::2], self._codes[1::2]
+
+    def get_ingredient_names(self) -> list[str]:
+        """Returns the names of the ingredients, without formatting the
+        rest of the recipe.
+        """
+        return [INGREDIENTS.get_string(code) for code in self._codes[1::2]]
+
+    def to_tuple(self) -> tuple[str, str]:
+        """Returns the recipe in the (name, ingredients) tuple format."""
+        if self._tuple is None:
+            self._tuple = (self.name, ','.join(
+                f'{format_amount(amount)} {measure} {name}'
+                for amount, measure, name in self.get_ingredient_tuples()))
+        return self._tuple
+
+    def get_ingredient_string(self) -> str:
+        """Returns the ingredients as a comma separated string."""
+        return self.to_tuple()[1]
+
+    def get_ingredient_tuples(self) -> tuple[tuple[float, str, str]]:
+        """Returns the ingredients in the recipe_ingredients format."""
+        if self._ingredient_tuples is None:
+            measure = MEASURES.get_string
+            ingredient = INGREDIENTS.get_string
+            self._ingredient_tuples = tuple(
+                (amount, measure(m), ingredient(i)) for amount, m, i
+                in zip(*self.get_ingredient_codes()))
+        return self._ingredient_tuples
+
+    def __getitem__(self, index: int) -> str:
+        # recipe[0] is by far the most common lookup, and needs no formatting
+        if index == 0:
+            return self.name
+        return self.to_tuple()[index]
+
+    def __iter__(self):
+        return iter(self.to_tuple())
+
+    def __len__(self) -> int:
+        return 2
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Recipe):
+            return (self.name == other.name and self._amounts
+                    == other._amounts and self._codes == other._codes)
+        if isinstance(other, tuple):
+            # equal to exactly its to_tuple(), so it hashes like that tuple
+            # and a Recipe and its tuple count as one dictionary key
+            return self.to_tuple() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(self.to_tuple())
+        return self._hash
+
+    def __reduce__(self):
+        # codes are only meaningful in this process's string tables, so
+        # another process is sent the recipe tuple and interns it itself
+        return (self.__class__.from_tuple, (self.to_tuple(),))
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}.from_tuple({self.to_tuple()!r})'
+
+
 def num_hours() -> float:
     """
     Returns the estimated number of hours spent on the assignment, as a float.
@@ -51,12 +746,26 @@ def parse_ingredient(raw_ingredient_detail: str) -> tuple[float, str, str]:
     return  (amount, measure, ingredient)
 
 
-def create_recipe() -> tuple[str, str]:
+def format_amount(amount: float) -> str:
+    """
+    Return an amount as it would be written in a recipe, without a
+    trailing .0 on whole numbers.
+
+    >>> format_amount(300.0), format_amount(0.5)
+    ('300', '0.5')
+    """
+    text = repr(amount)
+    return text[:-2] if text.endswith('.0') else text
+
+
+def create_recipe(read_line=input) -> tuple[str, str]:
     """
     Return a recipe in the tuple[str, str] format after a series of prompting.
     The recipe name is prompted first followed by continuous ingredient
     prompting until an empty string is entered
     (enter or return key press with no text).
+    Lines are read with read_line, which is input unless a batch script
+    is supplying the answers.
 
     >>> def create_recipe()
     Please enter the recipe name: peanut butter
@@ -66,10 +775,10 @@ def create_recipe() -> tuple[str, str]:
     Please enter an ingredient:
     ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')
     """
-    recipe_name = input('Please enter the recipe name: ')
+    recipe_name = read_line('Please enter the recipe name: ')
     ingredient_list = ''
     while True:
-        ingredient = input('Please enter an ingredient: ')
+        ingredient = read_line('Please enter an ingredient: ')
         if ingredient == '':
             break
 
@@ -92,16 +801,160 @@ def recipe_ingredients(recipe: tuple[str, str]) -> tuple[tuple[float, str, str]]
     ((300.0, 'g', 'peanuts'), (0.5, 'tsp', 'salt'), (2.0, 'tsp', 'oil'))
 
     """
-    
-    recipe_list = ()
-    ingredients = tuple(recipe[1].split(','))
-    for x in ingredients:
-        recipe_list += (parse_ingredient(x),)
-    
-    return recipe_list
+    if isinstance(recipe, Recipe):
+        return recipe.get_ingredient_tuples()
+    return _parse_ingredients(recipe[1])
+
+
+@lru_cache(maxsize=RECIPE_CACHE_SIZE)
+def _parse_ingredients(raw_ingredients: str) -> tuple[tuple[float, str, str]]:
+    """Parses a comma separated ingredient string. The result is cached by
+    the raw string, so the same recipe is only tokenized once.
+    """
+    return tuple(parse_ingredient(x) for x in raw_ingredients.split(','))
+
+
+def recipe_cache_info():
+    """
+    Return the hits, misses, maxsize and currsize of the parsed recipe cache
+    used by recipe_ingredients.
+    """
+    return _parse_ingredients.cache_info()
+
+
+def normalise_recipe_name(name: str) -> str:
+    """
+    Return a recipe name as the cook book keeps it: lower case, without
+    leading, trailing or repeated spaces. Every way a recipe enters the cook
+    book, and every lookup by name, goes through this.
+
+    >>> normalise_recipe_name('  Peanut  Butter ')
+    'peanut butter'
+    """
+    return ' '.join(name.split()).lower()
+
+
+def validate_recipe(recipe: tuple[str, str]) -> str | None:
+    """
+    Return None if every ingredient of the recipe can be parsed by
+    parse_ingredient, otherwise a message describing the first problem.
+
+    >>> validate_recipe(('peanut butter', '300 g peanuts,0.5 tsp salt'))
+    >>> validate_recipe(('peanut butter', '300 g peanuts,a pinch of salt'))
+    "bad ingredient 'a pinch of salt'"
+    """
+    if recipe[0].strip() == '':
+        return 'missing recipe name'
+    for raw_ingredient in recipe[1].split(','):
+        try:
+            amount, measure, ingredient = parse_ingredient(raw_ingredient)
+        except (ValueError, IndexError):
+            return f'bad ingredient {raw_ingredient!r}'
+        if ingredient == '':
+            return f'bad ingredient {raw_ingredient!r}'
+    return None
+
+
+def _read_csv_recipes(file):
+    """Yields (line number, recipe) for each row of a csv recipe file.
+
+    Each row is the recipe name followed by its ingredients, either as one
+    quoted comma separated field or as one field per ingredient. A first row
+    starting with 'name' is treated as a header.
+    """
+    reader = csv.reader(file)
+    for row in reader:
+        if not row or (reader.line_num == 1 and row[0].lower() == 'name'):
+            continue
+        if len(row) < 2:
+            yield reader.line_num, None
+        else:
+            yield reader.line_num, (row[0].strip(),
+                                    ','.join(x.strip() for x in row[1:]))
+
+
+def _read_jsonl_recipes(file):
+    """Yields (line number, recipe) for each line of a json lines recipe file.
+
+    Each line is an object with a "name" and "ingredients", where the
+    ingredients are a comma separated string or a list of strings.
+    """
+    for line_number, line in enumerate(file, 1):
+        if line.strip() == '':
+            continue
+        try:
+            entry = json.loads(line)
+            name = entry['name']
+            ingredients = entry['ingredients']
+        except (ValueError, KeyError, TypeError):
+            yield line_number, None
+            continue
+        if isinstance(ingredients, list):
+            ingredients = ','.join(ingredients)
+        if not isinstance(name, str) or not isinstance(ingredients, str):
+            yield line_number, None
+        else:
+            yield line_number, (name.strip(), ingredients)
+
+
+def read_recipe_file(filename: str):
+    """
+    Lazily read the recipes in a .csv or .jsonl recipe file.
+    Yields (line_number, recipe, error) for each recipe in the file, where
+    recipe is None and error describes the problem if the line is
+    malformed, otherwise error is None. Recipes are Recipes, with names
+    normalised by normalise_recipe_name. Only one line is held in memory
+    at a time.
+    """
+    if filename.endswith(('.jsonl', '.json')):
+        read_lines = _read_jsonl_recipes
+    else:
+        read_lines = _read_csv_recipes
+    with open(filename, newline='', encoding='utf-8') as file:
+        for line_number, recipe in read_lines(file):
+            if recipe is None:
+                yield line_number, None, 'malformed line'
+                continue
+            error = validate_recipe(recipe)
+            if error is None:
+                yield line_number, Recipe.from_tuple(
+                    (normalise_recipe_name(recipe[0]), recipe[1])), None
+            else:
+                yield line_number, None, error
 
 
-def add_recipe(new_recipe: tuple[str, str], recipes: list[tuple[str, str]]) -> None:
+def import_recipes(filename: str, recipes: list[tuple[str, str]] | Cookbook,
+                   batch_size: int = IMPORT_BATCH_SIZE,
+                   max_errors: int = IMPORT_MAX_ERRORS
+                   ) -> tuple[int, int, list[tuple[int, str]]]:
+    """
+    Stream the recipes in a recipe file into recipes, batch_size recipes at
+    a time. Malformed lines are skipped rather than stopping the import.
+    Returns the number of recipes loaded, the number of malformed lines and
+    the (line_number, error) details of the first max_errors of them.
+    """
+    loaded = 0
+    failed = 0
+    errors = []
+    batch = []
+    for line_number, recipe, error in read_recipe_file(filename):
+        if error is not None:
+            failed += 1
+            if len(errors) < max_errors:
+                errors.append((line_number, error))
+            continue
+        batch.append(recipe)
+        if len(batch) >= batch_size:
+            recipes.extend(batch)
+            loaded += len(batch)
+            batch.clear()
+    recipes.extend(batch)
+    loaded += len(batch)
+    return loaded, failed, errors
+
+
+def add_recipe(new_recipe: tuple[str, str],
+               recipes: list[tuple[str, str]] | Cookbook) -> None:
     """
     Add a given recipe, new_recipe, into the list of recipes.
     Hint: This function doesn’t return
@@ -124,12 +977,14 @@ def add_recipe(new_recipe: tuple[str, str], recipes: list[tuple[str, str]]) -> N
     return
 
 def find_recipe(recipe_name: str,
-                recipes: list[tuple[str, str]]) -> tuple[str, str] | None:
+                recipes: list[tuple[str, str]] | Cookbook) -> tuple[str, str] | None:
     """
     Return a recipe or None. This function should attempt to
     find the recipe by the given recipe name
     within the list of recipes. If the recipe can not be found
     then this function should return None.
+    If recipes is a Cookbook (or cookbook_store.SQLiteCookbook) the lookup
+    is a single indexed lookup instead of a scan.
     Example:
     >>> recipes = [('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')]
     >>> find_recipe('peanut butter', recipes)
@@ -137,12 +992,16 @@ def find_recipe(recipe_name: str,
     >>> find_recipe('cinnamon rolls', recipes)
     >>> print(find_recipe('cinnamon rolls', recipes))
     None
+    >>> find_recipe('peanut butter', tuple(recipes))[0]
+    'peanut butter'
     """
+    if hasattr(recipes, 'get_recipe'):
+        return recipes.get_recipe(recipe_name)
     for x in recipes:
         if recipe_name == x[0]:
             return x
 
-def remove_recipe(name: str, recipes: list[tuple[str, str]]) -> None:
+def remove_recipe(name: str, recipes: list[tuple[str, str]] | Cookbook) -> None:
     """
     Remove a recipe from the list of recipes given the name of a recipe.
     If the recipe name does not match any of the recipes within the list
@@ -164,6 +1023,9 @@ def remove_recipe(name: str, recipes: list[tuple[str, str]]) -> None:
     >>> recipes
     [('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')]
     """
+    if hasattr(recipes, 'remove_name'):
+        recipes.remove_name(name)
+        return
     for x in recipes:
         if name == x[0]:
           recipes.remove(x)
@@ -284,9 +1146,12 @@ def remove_from_shopping_list(ingredient_name: str, amount: float, shopping_list
     return
 
 
-def generate_shopping_list(recipes: list[tuple[str, str]]) -> list[tuple[float, str, str]]:
+def generate_shopping_list(recipes: list[tuple[str, str]],
+                           convert_units: bool = False) -> list[tuple[float, str, str]]:
     """
     Return a list of ingredients, (amount, measure, ingredient_name), given a list of recipes.
+    If convert_units is True, amounts of the same ingredient in different
+    units (e.g. g and kg) are combined and shown in a sensible unit.
     Example:
     >>> shopping_list = generate_shopping_list([PEANUT_BUTTER,
     MUNG_BEAN_OMELETTE])
@@ -304,13 +1169,64 @@ def generate_shopping_list(recipes: list[tuple[str, str]]) -> list[tuple[float,
     'garlic powder'), (0.25, 'tsp', 'onion powder'), (0.125, 'tsp',
     'pepper'), (0.25, 'tsp', 'turmeric'), (1.0, 'cup', 'soy milk')]
     """
-    list_of_ingredients = []
+    return generate_meal_plan_shopping_list(count_recipes(recipes),
+                                            convert_units)
 
-    for x in recipes:
-        ingredients = list(recipe_ingredients(x))
-        for y in ingredients:
-            add_to_shopping_list(y, list_of_ingredients)
-    return list_of_ingredients
+
+def count_recipes(recipes: list[tuple[str, str]]) -> list[tuple[tuple[str, str], int]]:
+    """
+    Return a meal plan of (recipe, multiplier) pairs given a list of recipes,
+    where the multiplier is the number of times the recipe appears.
+    Recipes are kept in the order they first appear.
+
+    >>> count_recipes([('toast', '2 slice bread'), ('tea', '1 bag tea'),
+    ... ('toast', '2 slice bread')])
+    [(('toast', '2 slice bread'), 2), (('tea', '1 bag tea'), 1)]
+    """
+    counts = {}
+    for recipe in recipes:
+        counts[recipe] = counts.get(recipe, 0) + 1
+    return list(counts.items())
+
+
+def generate_meal_plan_shopping_list(meal_plan: list[tuple[tuple[str, str], float]],
+                                     convert_units: bool = False) -> list[tuple[float, str, str]]:
+    """
+    Return the shopping list of a meal plan of (recipe, multiplier) pairs.
+    Each recipe's parsed amounts are multiplied once, so 500 portions of a
+    recipe cost the same as one. Multipliers need not be whole numbers,
+    e.g. 1.5 for one and a half batches.
+
+    >>> generate_meal_plan_shopping_list([(('toast', '2 slice bread'), 500)])
+    [(1000.0, 'slice', 'bread')]
+    """
+    aggregate = IngredientAggregate(convert_units)
+    for recipe, multiplier in meal_plan:
+        aggregate.add_recipe(recipe, multiplier)
+    return aggregate.to_list()
+
+
+def net_shopping_list(plan: list[tuple[str, str]],
+                      pantry: list[tuple[float, str, str]],
+                      convert_units: bool = True) -> list[tuple[float, str, str]]:
+    """
+    Return the shopping list of a list of recipes, less what is already in
+    the pantry. The pantry is a list of (amount, measure, ingredient) tuples,
+    like a shopping list. Each pantry item is one lookup in the totals of
+    the plan, and anything the pantry fully covers is left off the list.
+    With convert_units (the default) the pantry may use different units to
+    the recipes, e.g. 1 kg of peanuts covers 300 g.
+
+    >>> net_shopping_list([('peanut butter', '300 g peanuts,0.5 tsp salt')],
+    ... [(0.2, 'kg', 'peanuts'), (1.0, 'cup', 'salt'), (5.0, 'g', 'sugar')])
+    [(100.0, 'g', 'peanuts')]
+    """
+    aggregate = IngredientAggregate(convert_units)
+    for recipe, multiplier in count_recipes(plan):
+        aggregate.add_recipe(recipe, multiplier)
+    for ingredient_details in pantry:
+        aggregate.subtract(ingredient_details)
+    return aggregate.to_list()
 
 
 def display_ingredients(shopping_list: list[tuple[float, str, str]]) -> None:
@@ -318,6 +1234,8 @@ def display_ingredients(shopping_list: list[tuple[float, str, str]]) -> None:
     
     Print the given shopping list in any order you wish. CSSE7030 students must display the shopping
     list alphabetically based on the name of the ingredients. See example in Appendix.
+    The shopping list itself is left unsorted; see render.py for other
+    output formats and for printing a page of a long list.
     Note: The amount of spaces changes depending on how long the longest text is. The order
     does not matter.
     Example:
@@ -342,51 +1260,8 @@ def display_ingredients(shopping_list: list[tuple[float, str, str]]) -> None:
     | 1.0 | tbsp | flax seed |
 
     """
-    longest_amount = 0
-    longest_measure = 0
-    longest_ingred = 0
+    render_table(shopping_list)
 
-    shopping_list.sort(key = lambda x: x[2])
-        
-    for x in shopping_list: #find width of display
-        for no, y in enumerate(x):
-            if no == 0:
-                if len(str(y)) > longest_amount:
-                    longest_amount = len(str(y))
-                else:
-                    pass
-            elif no == 1:
-                if len(y) > longest_measure:
-                    longest_measure = len(y)
-                else:
-                    pass
-            elif no == 2:
-                if len(y) > longest_ingred:
-                    longest_ingred = len(y)
-                else:
-                    pass    
-    default_l_buffer = ' '
-    default_r_buffer = '  '
-    for x in shopping_list: #print display
-        for no, y in enumerate(x):
-            if no == 0:
-                amount = '| ' + str(y).rjust((longest_amount), ' ') + ' |'
-            elif no == 1:
-                if longest_measure == len(y):
-                    measure = default_l_buffer + y + default_r_buffer
-                elif (longest_measure - len(y)) % 2 == 0:
-                    left_buffer = right_buffer = ((longest_measure - len(y))//2)
-                    measure = default_l_buffer + (left_buffer * ' ') + y + (right_buffer * ' ') + default_r_buffer
-                else:
-                    left_buffer = (((longest_measure - len(y)) // 2) + 1)
-                    right_buffer = longest_measure - len(y) - left_buffer
-                    measure = default_l_buffer + (left_buffer * ' ') + y + (right_buffer * ' ') + default_r_buffer
-            elif no == 2:
-                ingred = '| ' + y.ljust((longest_ingred), ' ') + '  |'
-        line = [amount, measure, ingred]
-        line = ''.join(line)
-        print(line)
-    return 
 
 def sanitise_command(command: str) -> str:
     """
@@ -406,91 +1281,3 @@ def sanitise_command(command: str) -> str:
             new_str += x
     new_str = new_str.strip()
     return new_str
-
-
-
-def main():
-    """
-    H or h: Help
-    mkrec: creates a recipe, add to cook book.
-    add {recipe}: adds a recipe to the collection.
-    rm {recipe}: removes a recipe from the collection.
-    rm -i {ingredient_name} {amount}: removes ingredient from shopping list.
-    ls: list all recipes in shopping cart.
-    ls -a: list all available recipes in cook book.
-    ls -s: display shopping list.
-    g or G: generates a shopping list.
-    Q or q: Quit.
-
-    """
-    # cook book
-    recipe_collection = [
-        CHOCOLATE_PEANUT_BUTTER_SHAKE, 
-        BROWNIE, 
-        SEITAN, 
-        CINNAMON_ROLLS, 
-        PEANUT_BUTTER, 
-        MUNG_BEAN_OMELETTE
-    ]
-    
-    # Write the rest of your code here
-    #initiating varibles
-    command = ''
-    list_of_recipes = []
-    shopping_list = []
-    while command != 'q':
-        entry = input('Please enter a command: ')
-        command = sanitise_command(entry.split(' ')[0])
-        #start commands
-        if command == 'h':
-            print('    H or h: Help\n'
-            '    mkrec: creates a recipe, add to cook book.\n'
-            '    add {recipe}: adds a recipe to the collection.\n'
-            '    rm {recipe}: removes a recipe from the collection.\n'
-            '    rm -i {ingredient_name} {amount}: removes ingredient from shopping list.\n'
-            '    ls: list all recipes in shopping cart.\n'
-            '    ls -a: list all available recipes in cook book.\n'
-            '    ls -s: display shopping list.\n'
-            '    g or G: generates a shopping list.\n'
-            '    Q or q: Quit.')
-        elif command == 'mkrec':
-            recipe_collection.append(create_recipe())
-            
-        elif command == 'add':
-            recipe_name = sanitise_command(' '.join(entry.split(' ')[1:]))
-            recipe = find_recipe(recipe_name, recipe_collection)
-            if recipe == None:
-                print('\nRecipe does not exist in the cook book. \n'
-                      'Use the mkrec command to create a new recipe.\n')
-            else:
-                add_recipe(recipe, list_of_recipes)
-            
-        elif command == 'rm':
-            removals = entry.split(' ')[1:]
-            if removals[0] != '-i':
-                #remove recipe
-                recipe_name = ' '.join(removals)
-                remove_recipe(recipe_name, list_of_recipes)
-            else:
-                #remove ingredients
-                remove_from_shopping_list(' '.join(removals[1:-1]), float(removals[-1]), shopping_list)
-        elif entry == 'ls':
-            if list_of_recipes == []:
-                print('No recipe in meal plan yet.')
-            else:
-                print(list_of_recipes)
-
-        elif entry == 'ls -a':
-            for x in recipe_collection:
-                print(x[0])
-
-        elif entry == 'ls -s':
-            display_ingredients(shopping_list)
-
-        elif command == 'g':
-            shopping_list = generate_shopping_list(list_of_recipes)
-            display_ingredients(shopping_list)
-
-    
-if __name__ == "__main__":
-    main()
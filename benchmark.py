@@ -0,0 +1,306 @@
+"""
+Benchmarks for the recipe and shopping list functions of CSSE1001
+Assignment 1.
+
+Synthetic cook books and meal plans are generated at several scales, from a
+seed so every run sees the same recipes. Each benchmark is timed (best of a
+few repeats) and then run once more under tracemalloc for its peak memory.
+Results can be written as JSON and compared with an earlier run:
+
+    python benchmark.py --scales 100 10000 1000000 --output new.json
+    python benchmark.py --output new.json --compare old.json
+
+--memory COUNT instead measures the memory of a parsed cook book of COUNT
+recipes held as plain split strings, as interned strings and as Recipes.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from a1 import (Cookbook, Recipe, _parse_ingredients, display_ingredients,
+                find_recipe, generate_shopping_list, parse_ingredient,
+                recipe_ingredients, remove_from_shopping_list)
+from shopping_list import StringTable
+
+DEFAULT_SCALES = (100, 1000, 10000, 100000)
+
+# Per-item benchmarks time at most this many calls, whatever the scale
+MAX_OPERATIONS = 100000
+
+# Lookups in a plain list are a scan of the list, so time only this many
+LIST_LOOKUPS = 100
+
+# Names of the synthetic ingredients, and the measures and amounts they use
+INGREDIENT_NAMES = 2000
+MEASURES = ('g', 'kg', 'ml', 'l', 'tsp', 'tbsp', 'cup', 'large', 'slice')
+AMOUNTS = (0.125, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 50.0, 100.0, 300.0)
+
+
+def synthetic_recipes(count: int, seed: int = 0) -> list[tuple[str, str]]:
+    """
+    Return count recipes named 'recipe 0', 'recipe 1', ... with 3 to 12
+    ingredients each. An ingredient always has the same measure.
+    """
+    rng = random.Random(seed)
+    measures = [rng.choice(MEASURES) for _ in range(INGREDIENT_NAMES)]
+    recipes = []
+    for number in range(count):
+        ingredients = rng.sample(range(INGREDIENT_NAMES), rng.randint(3, 12))
+        recipes.append((f'recipe {number}', ','.join(
+            f'{rng.choice(AMOUNTS)} {measures[x]} ingredient {x}'
+            for x in ingredients)))
+    return recipes
+
+
+def synthetic_meal_plan(recipes: list[tuple[str, str]], count: int,
+                        seed: int = 0) -> list[tuple[str, str]]:
+    """Return count recipes drawn from recipes with replacement."""
+    return random.Random(seed).choices(recipes, k=count)
+
+
+def _bench_find_recipe(recipes, cookbook, plan, shopping_list) -> int:
+    names = [recipe[0] for recipe in plan[:MAX_OPERATIONS]]
+    for name in names:
+        find_recipe(name, cookbook)
+    return len(names)
+
+
+def _bench_find_recipe_list(recipes, cookbook, plan, shopping_list) -> int:
+    names = [recipe[0] for recipe in plan[:LIST_LOOKUPS]]
+    for name in names:
+        find_recipe(name, recipes)
+    return len(names)
+
+
+def _bench_recipe_ingredients(recipes, cookbook, plan, shopping_list) -> int:
+    # a cold cache, so every recipe is parsed
+    _parse_ingredients.cache_clear()
+    for recipe in recipes[:MAX_OPERATIONS]:
+        recipe_ingredients(recipe)
+    return min(len(recipes), MAX_OPERATIONS)
+
+
+def _bench_generate_shopping_list(recipes, cookbook, plan,
+                                  shopping_list) -> int:
+    generate_shopping_list(plan)
+    return len(plan)
+
+
+def _bench_remove_from_shopping_list(recipes, cookbook, plan,
+                                     shopping_list) -> int:
+    remaining = list(shopping_list)
+    for amount, measure, name in shopping_list:
+        remove_from_shopping_list(name, amount / 2, remaining)
+    return len(shopping_list)
+
+
+def _bench_display_ingredients(recipes, cookbook, plan, shopping_list) -> int:
+    with contextlib.redirect_stdout(io.StringIO()):
+        display_ingredients(shopping_list)
+    return len(shopping_list)
+
+
+# benchmark name -> function running it and returning the operations done
+BENCHMARKS = {
+    'find_recipe': _bench_find_recipe,
+    'find_recipe_list': _bench_find_recipe_list,
+    'recipe_ingredients': _bench_recipe_ingredients,
+    'generate_shopping_list': _bench_generate_shopping_list,
+    'remove_from_shopping_list': _bench_remove_from_shopping_list,
+    'display_ingredients': _bench_display_ingredients,
+}
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, names=None, repeat: int = 3,
+                   seed: int = 0) -> list[dict]:
+    """
+    Return a result per scale and benchmark, with the number of operations,
+    the best time in seconds, operations per second and the peak memory
+    allocated while it ran, in bytes.
+
+    Parameters:
+        scales: the cook book sizes; the meal plan is the same size
+        names: the benchmarks to run (keys of BENCHMARKS), defaults to all
+        repeat: the number of timed runs, of which the fastest is kept
+        seed: seeds the synthetic cook book and meal plan
+    """
+    results = []
+    for scale in scales:
+        recipes = synthetic_recipes(scale, seed)
+        cookbook = Cookbook(recipes)
+        plan = synthetic_meal_plan(recipes, scale, seed)
+        shopping_list = generate_shopping_list(plan)
+        data = (recipes, cookbook, plan, shopping_list)
+        for name in names or BENCHMARKS:
+            benchmark = BENCHMARKS[name]
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                operations = benchmark(*data)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            tracemalloc.start()
+            benchmark(*data)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append({
+                'benchmark': name,
+                'recipes': scale,
+                'operations': operations,
+                'seconds': best,
+                'ops_per_second': operations / best if best > 0 else None,
+                'peak_bytes': peak,
+            })
+    return results
+
+
+def _split_parser():
+    """Returns a function parsing a recipe tuple into plain split strings,
+    so every measure and name is a new string object.
+    """
+    return lambda recipe: (recipe[0], tuple(
+        parse_ingredient(x) for x in recipe[1].split(',')))
+
+
+def _interned_parser():
+    """Returns a function parsing a recipe tuple into strings interned in
+    string tables of its own, so their memory is measured with the recipes.
+    """
+    measures = StringTable()
+    ingredients = StringTable()
+
+    def parse(recipe):
+        return (recipe[0], tuple(
+            (amount, measures.intern(measure), ingredients.intern(name))
+            for amount, measure, name
+            in map(parse_ingredient, recipe[1].split(','))))
+    return parse
+
+
+# layout name -> function returning a parser of recipe tuples to that layout
+LAYOUTS = {
+    'split strings': _split_parser,
+    'interned strings': _interned_parser,
+    'Recipe codes': lambda: Recipe.from_tuple,
+}
+
+
+def measure_memory(count: int, seed: int = 0) -> dict[str, int]:
+    """
+    Return the bytes allocated to hold count parsed synthetic recipes in
+    each of the LAYOUTS, including the string tables the interned layouts
+    add to.
+    """
+    recipes = synthetic_recipes(count, seed)
+    result = {}
+    for name, parser in LAYOUTS.items():
+        tracemalloc.start()
+        parse = parser()
+        parsed = [parse(recipe) for recipe in recipes]
+        result[name] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del parsed
+    return result
+
+
+def _commit() -> str | None:
+    """Returns the git commit being benchmarked, if there is one."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))
+                              ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: list[dict], new: list[dict],
+            threshold: float = 1.2) -> list[tuple[str, int, float]]:
+    """
+    Return (benchmark, recipes, slowdown) for every result in new that took
+    more than threshold times as long per operation as the same benchmark
+    and scale in old.
+    """
+    before = {(x['benchmark'], x['recipes']): x for x in old}
+    regressions = []
+    for result in new:
+        previous = before.get((result['benchmark'], result['recipes']))
+        if previous is None or not previous['ops_per_second'] \
+                or not result['ops_per_second']:
+            continue
+        slowdown = previous['ops_per_second'] / result['ops_per_second']
+        if slowdown > threshold:
+            regressions.append((result['benchmark'], result['recipes'],
+                                slowdown))
+    return regressions
+
+
+def _print_results(results: list[dict]) -> None:
+    """Prints the results as a table."""
+    for x in results:
+        rate = x['ops_per_second'] or 0.0
+        print(f"{x['benchmark']:<26} {x['recipes']:>8} "
+              f"{x['seconds']:>10.4f} s {rate:>14.0f} ops/s "
+              f"{x['peak_bytes'] / 1e6:>9.2f} MB")
+
+
+def main(argv=None) -> int:
+    """Runs the benchmarks from the command line. Returns 1 if a comparison
+    found a regression, otherwise 0.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scales', type=int, nargs='+',
+                        default=list(DEFAULT_SCALES),
+                        help='cook book sizes to run at')
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS),
+                        help='benchmarks to run, all by default')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', metavar='FILE',
+                        help='write the results to FILE as JSON')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='report regressions against the results in FILE')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='slowdown reported as a regression')
+    parser.add_argument('--memory', type=int, metavar='COUNT',
+                        help='measure the memory of COUNT parsed recipes')
+    args = parser.parse_args(argv)
+
+    if args.memory is not None:
+        sizes = measure_memory(args.memory, args.seed)
+        baseline = sizes['split strings']
+        for name, size in sizes.items():
+            print(f'{name:<18} {size / 1e6:>10.1f} MB '
+                  f'{size / args.memory:>8.0f} bytes/recipe '
+                  f'{size / baseline:>6.0%}')
+        return 0
+
+    results = run_benchmarks(args.scales, args.benchmarks, args.repeat,
+                             args.seed)
+    _print_results(results)
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump({'commit': _commit(),
+                       'python': platform.python_version(),
+                       'seed': args.seed,
+                       'results': results}, file, indent=1)
+    if args.compare is None:
+        return 0
+    with open(args.compare) as file:
+        old = json.load(file)['results']
+    regressions = compare(old, results, args.threshold)
+    for name, scale, slowdown in regressions:
+        print(f'{name} at {scale} recipes is {slowdown:.2f}x slower')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
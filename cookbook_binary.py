@@ -0,0 +1,279 @@
+"""
+Compact binary cook book format for CSSE1001 Assignment 1.
+
+write_binary_cookbook stores recipes already parsed, and BinaryCookbook
+memory maps the file and only decodes a recipe when it is asked for, so
+opening a cook book costs the same however large it is.
+
+File layout (little-endian, each section starting on an 8 byte boundary):
+    header      magic, version, counts and the offset of each section
+    strings     (string count + 1) u64 offsets into the string data,
+                then the UTF-8 string data. Names and measures are each
+                stored once.
+    ingredients one 16 byte record per ingredient: f64 amount,
+                u32 measure string, u32 ingredient name string
+    recipes     one 12 byte record per recipe: u32 name string,
+                u32 first ingredient record, u32 ingredient count
+    names       u32 recipe numbers sorted by name, for binary search
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from a1 import format_amount, parse_ingredient
+
+_MAGIC = b'CKBK'
+_VERSION = 1
+# magic, version, recipe count, ingredient count, string count, then the
+# offsets of the string offsets, string data, ingredients, recipes and names
+_HEADER = struct.Struct('<4sIIII5Q')
+_INGREDIENT = struct.Struct('<dII')
+_RECIPE_FIELDS = 3
+
+
+def _pad(file, position: int) -> int:
+    """Writes zero bytes up to the next multiple of 8 and returns the new
+    position.
+    """
+    padding = -position % 8
+    file.write(bytes(padding))
+    return position + padding
+
+
+def write_binary_cookbook(recipes, filename: str) -> None:
+    """
+    Write recipes to filename in the binary cook book format. As in a
+    Cookbook, a recipe with the same name as an earlier one replaces it,
+    keeping the earlier one's place, so each name is stored once.
+
+    Raises:
+        ValueError: if an ingredient can not be parsed by parse_ingredient.
+    """
+    if sys.byteorder != 'little':
+        raise ValueError('the binary cook book format is little-endian')
+    string_codes = {}
+    strings = []
+
+    def code(string: str) -> int:
+        if string not in string_codes:
+            string_codes[string] = len(strings)
+            strings.append(string.encode('utf-8'))
+        return string_codes[string]
+
+    by_name = {}
+    for name, raw_ingredients in recipes:
+        by_name[name] = raw_ingredients
+
+    ingredients = bytearray()
+    recipe_records = array('I')
+    ingredient_count = 0
+    for name, raw_ingredients in by_name.items():
+        first = ingredient_count
+        for raw_ingredient in raw_ingredients.split(','):
+            try:
+                amount, measure, ingredient = parse_ingredient(raw_ingredient)
+            except (ValueError, IndexError):
+                raise ValueError(f'bad ingredient {raw_ingredient!r} in '
+                                 f'recipe {name!r}') from None
+            ingredients += _INGREDIENT.pack(amount, code(measure),
+                                            code(ingredient))
+            ingredient_count += 1
+        recipe_records.extend((code(name), first, ingredient_count - first))
+
+    recipe_count = len(recipe_records) // _RECIPE_FIELDS
+    names = array('I', sorted(
+        range(recipe_count),
+        key=lambda x: strings[recipe_records[x * _RECIPE_FIELDS]]))
+    string_offsets = array('Q', [0])
+    for string in strings:
+        string_offsets.append(string_offsets[-1] + len(string))
+
+    with open(filename, 'wb') as file:
+        file.write(bytes(_HEADER.size))
+        position = _pad(file, _HEADER.size)
+        offsets = [position]
+        file.write(string_offsets)
+        position += len(string_offsets) * 8
+        offsets.append(position)
+        for string in strings:
+            file.write(string)
+        position = _pad(file, position + string_offsets[-1])
+        offsets.append(position)
+        file.write(ingredients)
+        position = _pad(file, position + len(ingredients))
+        offsets.append(position)
+        file.write(recipe_records)
+        position = _pad(file, position + len(recipe_records) * 4)
+        offsets.append(position)
+        file.write(names)
+        file.seek(0)
+        file.write(_HEADER.pack(_MAGIC, _VERSION, recipe_count,
+                                ingredient_count, len(strings), *offsets))
+
+
+class BinaryCookbook():
+    """A read only cook book backed by a memory mapped binary cook book file.
+
+    Only the header is read when the file is opened. Recipes are found by a
+    binary search over the sorted names and decoded when they are asked
+    for, so only the pages holding touched recipes are read from disk.
+    It can be passed to find_recipe in place of a Cookbook.
+
+    Attributes:
+        _file: the open cook book file
+        _map: the memory map of the file
+        _views: the memoryviews into the map, released on close
+        _string_offsets: u64 offsets of each string in the string data
+        _string_data: offset of the string data in the file
+        _strings: a dictionary of the strings decoded so far
+        _ingredients: offset of the ingredient records in the file
+        _recipes: u32 fields of the recipe records
+        _names: u32 recipe numbers sorted by name
+    """
+
+    def __init__(self, filename: str) -> None:
+        """Opens and memory maps a binary cook book file.
+
+        Args:
+            filename: path of a file written by write_binary_cookbook
+
+        Raises:
+            ValueError: if the file is not a binary cook book.
+
+        Returns:
+            None
+        """
+        self._file = open(filename, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f'{filename} is not a binary cook book') from None
+        if self._map.size() < _HEADER.size:
+            self.close()
+            raise ValueError(f'{filename} is not a binary cook book')
+        (magic, version, recipe_count, ingredient_count, string_count,
+         string_offsets, string_data, ingredients, recipes,
+         names) = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f'{filename} is not a binary cook book')
+        view = memoryview(self._map)
+        self._views = [view]
+        self._string_offsets = self._cast(
+            view, string_offsets, string_count + 1, 'Q')
+        self._string_data = string_data
+        self._strings = {}
+        self._ingredients = ingredients
+        self._recipes = self._cast(view, recipes,
+                                   recipe_count * _RECIPE_FIELDS, 'I')
+        self._names = self._cast(view, names, recipe_count, 'I')
+
+    def _cast(self, view: memoryview, offset: int, count: int,
+              code: str) -> memoryview:
+        """Returns a zero copy view of count items of type code at offset."""
+        size = struct.calcsize(code)
+        cast = view[offset:offset + count * size].cast(code)
+        self._views.append(cast)
+        return cast
+
+    def close(self) -> None:
+        """Closes the cook book file."""
+        for view in reversed(getattr(self, '_views', [])):
+            view.release()
+        self._views = []
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> 'BinaryCookbook':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _get_string(self, code: int) -> str:
+        """Returns the string with the given code, decoding it if needed."""
+        string = self._strings.get(code)
+        if string is None:
+            string = str(self._get_bytes(code), 'utf-8')
+            self._strings[code] = string
+        return string
+
+    def _get_bytes(self, code: int) -> bytes:
+        """Returns the encoded string with the given code."""
+        start = self._string_data + self._string_offsets[code]
+        end = self._string_data + self._string_offsets[code + 1]
+        return self._map[start:end]
+
+    def _find(self, name: str) -> int | None:
+        """Returns the number of the recipe with the given name, or None."""
+        target = name.encode('utf-8')
+        names = self._names
+        low, high = 0, len(names)
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_bytes(self._recipes[names[middle] * _RECIPE_FIELDS]
+                               ) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(names):
+            number = names[low]
+            if self._get_bytes(self._recipes[number * _RECIPE_FIELDS]) == target:
+                return number
+        return None
+
+    def _get_ingredients(self, number: int) -> tuple[tuple[float, str, str]]:
+        """Returns the parsed ingredients of a recipe number."""
+        field = number * _RECIPE_FIELDS
+        first, count = self._recipes[field + 1], self._recipes[field + 2]
+        ingredients = []
+        for offset in range(self._ingredients + first * _INGREDIENT.size,
+                            self._ingredients + (first + count)
+                            * _INGREDIENT.size, _INGREDIENT.size):
+            amount, measure, name = _INGREDIENT.unpack_from(self._map, offset)
+            ingredients.append((amount, self._get_string(measure),
+                                self._get_string(name)))
+        return tuple(ingredients)
+
+    def _get_recipe(self, number: int) -> tuple[str, str]:
+        """Returns a recipe number in the (name, ingredients) format."""
+        name = self._get_string(self._recipes[number * _RECIPE_FIELDS])
+        return (name, ','.join(
+            f'{format_amount(amount)} {measure} {ingredient}'
+            for amount, measure, ingredient in self._get_ingredients(number)))
+
+    def get_recipe(self, name: str) -> tuple[str, str] | None:
+        """Returns the recipe with the given name, or None if it is not
+        in the cook book.
+        """
+        number = self._find(name)
+        return None if number is None else self._get_recipe(number)
+
+    def get_ingredients(self, name: str) -> tuple[tuple[float, str, str]] | None:
+        """Returns the parsed ingredients of the recipe with the given name,
+        as recipe_ingredients would, or None if it is not in the cook book.
+        """
+        number = self._find(name)
+        return None if number is None else self._get_ingredients(number)
+
+    def get_names(self) -> list[str]:
+        """Returns the names of all recipes in the cook book, in order."""
+        return [self._get_string(self._recipes[field]) for field
+                in range(0, len(self._recipes), _RECIPE_FIELDS)]
+
+    def __contains__(self, item: str | tuple[str, str]) -> bool:
+        if isinstance(item, str):
+            return self._find(item) is not None
+        return self.get_recipe(item[0]) == tuple(item)
+
+    def __iter__(self):
+        for number in range(len(self)):
+            yield self._get_recipe(number)
+
+    def __len__(self) -> int:
+        return len(self._names)
@@ -0,0 +1,257 @@
+"""
+SQLite backed cook book for CSSE1001 Assignment 1.
+
+SQLiteCookbook stores recipes in a database file instead of memory, so the
+cook book survives between runs and never has to be loaded in full. It has
+the same methods as a1.Cookbook (and its IngredientIndex), so it can be
+passed to find_recipe, add_recipe, remove_recipe and import_recipes.
+Lookups, ingredient searches and shopping list totals are done in SQL.
+"""
+
+import sqlite3
+from a1 import parse_ingredient
+from trigram_index import TrigramIndex
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS recipe (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    ingredients TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingredient (
+    recipe_id INTEGER NOT NULL REFERENCES recipe (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    measure TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, position)
+);
+CREATE INDEX IF NOT EXISTS ingredient_name ON ingredient (name);
+'''
+
+# Meal plan positions are shifted by this many bits when ordering shopping
+# list rows, so a recipe's ingredient positions fit below them
+_POSITION_BITS = 20
+
+
+class SQLiteCookbook():
+    """A cook book stored in an SQLite database.
+
+    Each recipe is stored once in the recipe table (with its original
+    ingredient string, so recipes come back exactly as they were added) and
+    once per parsed ingredient in the ingredient table. Both names are
+    indexed. Each change is committed as it is made.
+
+    Attributes:
+        _connection: the connection to the database
+        _name_index: a TrigramIndex of the recipe names, or None if it has
+            not been built yet
+    """
+
+    def __init__(self, filename: str) -> None:
+        """Opens, or creates, the cook book in the given database file.
+
+        Args:
+            filename: path of the database, or ':memory:'
+
+        Returns:
+            None
+        """
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        self._connection.executescript(_SCHEMA)
+        self._name_index = None
+
+    def close(self) -> None:
+        """Closes the database."""
+        self._connection.close()
+
+    def __enter__(self) -> 'SQLiteCookbook':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get_recipe(self, name: str) -> tuple[str, str] | None:
+        """Returns the recipe with the given name, or None if it is not
+        in the cook book.
+        """
+        return self._connection.execute(
+            'SELECT name, ingredients FROM recipe WHERE name = ?',
+            (name,)).fetchone()
+
+    def get_names(self) -> list[str]:
+        """Returns the names of all recipes in the cook book, in order."""
+        return [row[0] for row in self._connection.execute(
+            'SELECT name FROM recipe ORDER BY id')]
+
+    def get_index(self) -> 'SQLiteCookbook':
+        """Returns the cook book itself, which answers the same ingredient
+        queries as an IngredientIndex.
+        """
+        return self
+
+    def get_name_index(self) -> TrigramIndex:
+        """Returns a TrigramIndex of the recipe names, built on the first
+        call and kept up to date by this cook book afterwards.
+        """
+        if self._name_index is None:
+            self._name_index = TrigramIndex(
+                row[0] for row in self._connection.execute(
+                    'SELECT name FROM recipe'))
+        return self._name_index
+
+    def _insert(self, recipe: tuple[str, str]) -> None:
+        """Inserts or replaces (in place) a recipe without committing."""
+        cursor = self._connection.cursor()
+        row = cursor.execute('SELECT id FROM recipe WHERE name = ?',
+                             (recipe[0],)).fetchone()
+        if row is None:
+            cursor.execute('INSERT INTO recipe (name, ingredients)'
+                           ' VALUES (?, ?)', (recipe[0], recipe[1]))
+            recipe_id = cursor.lastrowid
+        else:
+            recipe_id = row[0]
+            cursor.execute('UPDATE recipe SET ingredients = ? WHERE id = ?',
+                           (recipe[1], recipe_id))
+            cursor.execute('DELETE FROM ingredient WHERE recipe_id = ?',
+                           (recipe_id,))
+        rows = []
+        for position, raw_ingredient in enumerate(recipe[1].split(',')):
+            try:
+                amount, measure, name = parse_ingredient(raw_ingredient)
+            except (ValueError, IndexError):
+                continue
+            rows.append((recipe_id, position, amount, measure, name))
+        cursor.executemany('INSERT INTO ingredient VALUES (?, ?, ?, ?, ?)',
+                           rows)
+        if self._name_index is not None:
+            self._name_index.add(recipe[0])
+
+    def append(self, recipe: tuple[str, str]) -> None:
+        """Adds a recipe to the cook book, replacing any recipe of the same
+        name.
+        """
+        with self._connection:
+            self._insert(recipe)
+
+    def extend(self, recipes: list[tuple[str, str]]) -> None:
+        """Adds each of the given recipes in a single transaction."""
+        with self._connection:
+            for recipe in recipes:
+                self._insert(recipe)
+
+    def remove_name(self, name: str) -> tuple[str, str] | None:
+        """Removes the recipe with the given name and returns it.
+
+        Returns:
+            The removed recipe, or None if it was not in the cook book.
+        """
+        recipe = self.get_recipe(name)
+        if recipe is not None:
+            with self._connection:
+                self._connection.execute('DELETE FROM recipe WHERE name = ?',
+                                         (name,))
+            if self._name_index is not None:
+                self._name_index.remove(name)
+        return recipe
+
+    def remove(self, recipe: tuple[str, str]) -> None:
+        """Removes the given recipe, like list.remove.
+
+        Raises:
+            ValueError: if the recipe is not in the cook book.
+        """
+        if self.get_recipe(recipe[0]) != recipe:
+            raise ValueError(f'{recipe!r} is not in the cookbook')
+        self.remove_name(recipe[0])
+
+    def recipes_with(self, ingredient: str) -> set[str]:
+        """Returns the names of the recipes that use an ingredient."""
+        return self.recipes_with_all([ingredient])
+
+    def recipes_with_all(self, ingredients: list[str]) -> set[str]:
+        """Returns the names of the recipes that use every one of the
+        ingredients.
+        """
+        ingredients = set(ingredients)
+        if not ingredients:
+            return set()
+        marks = ','.join('?' * len(ingredients))
+        return {row[0] for row in self._connection.execute(
+            'SELECT r.name FROM ingredient i JOIN recipe r ON r.id = i.recipe_id'
+            f' WHERE i.name IN ({marks}) GROUP BY r.id'
+            ' HAVING COUNT(DISTINCT i.name) = ?',
+            (*ingredients, len(ingredients)))}
+
+    def recipes_with_any(self, ingredients: list[str]) -> set[str]:
+        """Returns the names of the recipes that use at least one of the
+        ingredients.
+        """
+        ingredients = set(ingredients)
+        marks = ','.join('?' * len(ingredients))
+        return {row[0] for row in self._connection.execute(
+            'SELECT DISTINCT r.name FROM ingredient i'
+            ' JOIN recipe r ON r.id = i.recipe_id'
+            f' WHERE i.name IN ({marks})', tuple(ingredients))}
+
+    def cook_from_pantry(self, pantry: list[str], limit: int = 10
+                         ) -> list[tuple[str, int, int]]:
+        """Returns the recipes that make the most use of the pantry, ranked
+        as IngredientIndex.cook_from_pantry ranks them.
+        """
+        pantry = set(pantry)
+        marks = ','.join('?' * len(pantry))
+        return [(name, used, total - used) for name, used, total
+                in self._connection.execute(
+            'SELECT r.name, COUNT(DISTINCT CASE WHEN i.name IN'
+            f' ({marks}) THEN i.name END) AS used,'
+            ' COUNT(DISTINCT i.name) AS total FROM recipe r'
+            ' JOIN ingredient i ON i.recipe_id = r.id GROUP BY r.id'
+            ' HAVING used > 0 ORDER BY used DESC, total - used, r.name'
+            ' LIMIT ?', (*pantry, limit))]
+
+    def generate_shopping_list(self, recipe_names: list[str]
+                               ) -> list[tuple[float, str, str]]:
+        """Returns the shopping list of a meal plan of recipe names, totalled
+        with a GROUP BY in the database. Gives the same list as
+        a1.generate_shopping_list on the matching recipes (up to floating
+        point rounding, as repeated recipes are multiplied rather than
+        added); names that are not in the cook book are ignored.
+        """
+        plan = {}
+        for position, name in enumerate(recipe_names):
+            if name in plan:
+                plan[name][1] += 1
+            else:
+                plan[name] = [position, 1]
+        with self._connection:
+            cursor = self._connection.cursor()
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS plan (name TEXT'
+                           ' PRIMARY KEY, position INTEGER, count INTEGER)')
+            cursor.execute('DELETE FROM plan')
+            cursor.executemany('INSERT INTO plan VALUES (?, ?, ?)', (
+                (name, position, count)
+                for name, (position, count) in plan.items()))
+            # SQLite takes the bare measure column from the row with the MIN,
+            # i.e. the first time the ingredient appears in the meal plan
+            return [(amount, measure, name) for amount, measure, name, first
+                    in cursor.execute(
+                'SELECT SUM(i.amount * p.count), i.measure, i.name,'
+                f' MIN((p.position << {_POSITION_BITS}) + i.position) AS first'
+                ' FROM plan p JOIN recipe r ON r.name = p.name'
+                ' JOIN ingredient i ON i.recipe_id = r.id'
+                ' GROUP BY i.name ORDER BY first')]
+
+    def __contains__(self, item: str | tuple[str, str]) -> bool:
+        if isinstance(item, str):
+            return self.get_recipe(item) is not None
+        return self.get_recipe(item[0]) == tuple(item)
+
+    def __iter__(self):
+        return self._connection.execute(
+            'SELECT name, ingredients FROM recipe ORDER BY id')
+
+    def __len__(self) -> int:
+        return self._connection.execute(
+            'SELECT COUNT(*) FROM recipe').fetchone()[0]
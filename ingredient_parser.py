@@ -0,0 +1,209 @@
+"""
+Batch ingredient line parser for CSSE1001 Assignment 1.
+
+parse_ingredient in a1.py handles one '0.5 tsp salt' style line at a time
+and only plain decimal amounts. parse_ingredient_lines takes any number of
+lines, matches each against one precompiled regular expression, and returns
+the results as columns (see shopping_list.py) with an error code per line.
+Amounts may also be fractions ('1/2'), mixed numbers ('1 1/2'), unicode
+vulgar fractions ('½', '1½') and ranges ('2-3', '2 to 3'). Each batch
+interns its measures and names in string tables of its own, so parsing
+untrusted text does not grow the shared shopping_list tables.
+"""
+
+import re
+import unicodedata
+from array import array
+from shopping_list import INGREDIENTS, MEASURES, ShoppingList, StringTable
+
+# Error codes, one per parsed line
+OK = 0
+EMPTY = 1
+BAD_AMOUNT = 2
+MISSING_MEASURE = 3
+MISSING_INGREDIENT = 4
+
+ERROR_MESSAGES = {
+    OK: 'ok',
+    EMPTY: 'empty line',
+    BAD_AMOUNT: 'bad amount',
+    MISSING_MEASURE: 'missing measure',
+    MISSING_INGREDIENT: 'missing ingredient',
+}
+
+_VULGAR_FRACTIONS = {
+    character: unicodedata.numeric(character)
+    for character in '¼½¾⅐⅑⅒⅓⅔⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞'
+}
+
+_AMOUNT = (r'(?:\d+\s+\d+\s*/\s*\d+'
+           rf'|\d*\s*[{"".join(_VULGAR_FRACTIONS)}]'
+           r'|\d+\s*/\s*\d+'
+           r'|\d+(?:\.\d*)?|\.\d+)')
+
+_LINE = re.compile(
+    rf'\s*(?P<low>{_AMOUNT})(?:\s*(?:-|–|to)\s*(?P<high>{_AMOUNT}))?'
+    r'(?:\s+(?P<measure>\S+))?(?:\s+(?P<name>.*\S))?\s*')
+
+_PARTS = re.compile(r'(?:(?P<whole>\d+)\s*)?(?:(?P<vulgar>[^\d\s./])'
+                    r'|(?P<numerator>\d+)\s*/\s*(?P<denominator>\d+))')
+
+
+def parse_amount(text: str) -> float:
+    """
+    Return the value of an amount such as '2', '0.5', '1/2', '1 1/2' or '1½'.
+
+    Raises:
+        ValueError: if the amount can not be read.
+
+    >>> parse_amount('1 1/2'), parse_amount('½'), parse_amount('2¼')
+    (1.5, 0.5, 2.25)
+    """
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _PARTS.fullmatch(text.strip())
+    if parts is None:
+        raise ValueError(f'bad amount {text!r}')
+    value = float(parts['whole'] or 0)
+    if parts['vulgar'] is not None:
+        if parts['vulgar'] not in _VULGAR_FRACTIONS:
+            raise ValueError(f'bad amount {text!r}')
+        return value + _VULGAR_FRACTIONS[parts['vulgar']]
+    if int(parts['denominator']) == 0:
+        raise ValueError(f'bad amount {text!r}')
+    return value + int(parts['numerator']) / int(parts['denominator'])
+
+
+class ParsedIngredients():
+    """The result of parsing a batch of ingredient lines, as columns.
+
+    Row i describes line i. For a range such as '2-3' low is 2 and high is
+    3, otherwise they are equal. Lines that could not be parsed (including
+    ranges whose upper amount is below the lower) have a non zero error
+    code (see ERROR_MESSAGES), zero amounts and the codes of the empty
+    string as measure and ingredient.
+
+    Attributes:
+        low: float64 array of the lower amounts
+        high: float64 array of the upper amounts
+        measures: integer array of codes into measure_table
+        ingredients: integer array of codes into ingredient_table
+        errors: byte array of error codes
+        measure_table: a StringTable of the measures in this batch
+        ingredient_table: a StringTable of the ingredient names in this
+            batch
+    """
+
+    def __init__(self) -> None:
+        """Initialises an empty batch.
+
+        Returns:
+            None
+        """
+        self.low = array('d')
+        self.high = array('d')
+        self.measures = array('l')
+        self.ingredients = array('l')
+        self.errors = array('b')
+        self.measure_table = StringTable()
+        self.ingredient_table = StringTable()
+
+    def get_row(self, index: int) -> tuple[float, str, str] | None:
+        """Returns line index as an (amount, measure, ingredient) tuple,
+        using the upper amount of a range, or None if it had an error.
+        """
+        if self.errors[index] != OK:
+            return None
+        return (self.high[index],
+                self.measure_table.get_string(self.measures[index]),
+                self.ingredient_table.get_string(self.ingredients[index]))
+
+    def get_errors(self) -> list[tuple[int, str]]:
+        """Returns (line index, message) for every line with an error."""
+        return [(index, ERROR_MESSAGES[error])
+                for index, error in enumerate(self.errors) if error != OK]
+
+    def to_shopping_list(self) -> ShoppingList:
+        """Returns the lines without errors as a ShoppingList, using the
+        upper amount of each range. The batch's codes are translated to the
+        shared shopping_list tables once per distinct string.
+        """
+        measures = [MEASURES.get_code(self.measure_table.get_string(code))
+                    for code in range(len(self.measure_table))]
+        ingredients = [
+            INGREDIENTS.get_code(self.ingredient_table.get_string(code))
+            for code in range(len(self.ingredient_table))]
+        result = ShoppingList()
+        for amount, measure, ingredient, error in zip(
+                self.high, self.measures, self.ingredients, self.errors):
+            if error == OK:
+                result._add_row(amount, measures[measure],
+                                ingredients[ingredient])
+        return result
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+
+def parse_ingredient_lines(lines) -> ParsedIngredients:
+    """
+    Parse every line of an iterable of ingredient lines in one pass.
+
+    >>> parsed = parse_ingredient_lines(['1/2 cup flour', '2-3 cloves garlic',
+    ... '1 ½ tsp salt', 'a pinch of salt', '2 eggs'])
+    >>> [parsed.get_row(x) for x in range(3)]
+    [(0.5, 'cup', 'flour'), (3.0, 'cloves', 'garlic'), (1.5, 'tsp', 'salt')]
+    >>> parsed.low[1]
+    2.0
+    >>> parsed.get_errors()
+    [(3, 'bad amount'), (4, 'missing ingredient')]
+    >>> parse_ingredient_lines(['1-1/2 cup flour']).get_errors()
+    [(0, 'bad amount')]
+    """
+    result = ParsedIngredients()
+    match_line = _LINE.fullmatch
+    measure_code = result.measure_table.get_code
+    ingredient_code = result.ingredient_table.get_code
+    empty_measure = measure_code('')
+    empty_ingredient = ingredient_code('')
+    # amount text -> value, as the same few amounts appear on most lines
+    amounts = {}
+    for line in lines:
+        match = match_line(line)
+        error = OK
+        if match is None:
+            error = EMPTY if line.strip() == '' else BAD_AMOUNT
+        elif match['measure'] is None:
+            error = MISSING_MEASURE
+        elif match['name'] is None:
+            error = MISSING_INGREDIENT
+        if error == OK:
+            try:
+                low = amounts.get(match['low'])
+                if low is None:
+                    low = amounts[match['low']] = parse_amount(match['low'])
+                high = low
+                if match['high'] is not None:
+                    high = amounts.get(match['high'])
+                    if high is None:
+                        high = amounts[match['high']] = parse_amount(
+                            match['high'])
+            except ValueError:
+                error = BAD_AMOUNT
+            else:
+                if high < low:
+                    error = BAD_AMOUNT
+        if error == OK:
+            result.low.append(low)
+            result.high.append(high)
+            result.measures.append(measure_code(match['measure']))
+            result.ingredients.append(ingredient_code(match['name']))
+        else:
+            result.low.append(0.0)
+            result.high.append(0.0)
+            result.measures.append(empty_measure)
+            result.ingredients.append(empty_ingredient)
+        result.errors.append(error)
+    return result
@@ -0,0 +1,281 @@
+"""
+Meal plan journal for CSSE1001 Assignment 1.
+
+SessionJournal holds the meal plan and shopping list of a
+session.ShoppingSession and makes every change to them through itself. Each
+change is appended to a journal file as a JSON line, and the information
+needed to reverse it is pushed on an undo stack, so undoing a step is one
+pop and one inverse change rather than rebuilding the list. Every
+SNAPSHOT_EVERY changes the whole state is written to a snapshot file and
+the journal is emptied. After a crash the state is recovered by loading the
+snapshot and replaying the journal lines written since.
+
+Lines are flushed to the operating system as they are written, so nothing
+is lost if the program crashes, but only fsynced every FSYNC_EVERY lines,
+so at most that many changes are lost if the machine itself goes down.
+"""
+
+import json
+import os
+from collections import deque
+from a1 import IngredientAggregate, recipe_ingredients
+
+# Journal lines written between fsyncs
+FSYNC_EVERY = 16
+
+# Changes between snapshots
+SNAPSHOT_EVERY = 1000
+
+# Most changes that can be undone
+UNDO_LIMIT = 1000
+
+
+class SessionJournal():
+    """A meal plan and shopping list, with undo, optionally journalled to
+    a file.
+
+    Attributes:
+        recipes: the recipes in the meal plan
+        shopping_list: an IngredientAggregate of the meal plan
+        _path: the journal file, or None to keep nothing on disk
+        _file: the open journal file, or None
+        _undo: a deque of the inverse of each change, most recent last
+        _sequence: the number of the last change made
+        _since_snapshot: changes made since the last snapshot
+        _unsynced: journal lines written since the last fsync
+        _fsync_every, _snapshot_every: see FSYNC_EVERY and SNAPSHOT_EVERY
+    """
+
+    def __init__(self, path: str | None = None,
+                 fsync_every: int = FSYNC_EVERY,
+                 snapshot_every: int = SNAPSHOT_EVERY,
+                 undo_limit: int = UNDO_LIMIT) -> None:
+        """Initialises the journal, recovering the state left by an earlier
+        run from path and its snapshot if they exist.
+
+        Args:
+            path: the journal file; the snapshot is path + '.snapshot'
+            fsync_every: see FSYNC_EVERY
+            snapshot_every: see SNAPSHOT_EVERY
+            undo_limit: see UNDO_LIMIT
+
+        Returns:
+            None
+        """
+        self.recipes = []
+        self.shopping_list = IngredientAggregate()
+        self._path = path
+        self._file = None
+        self._undo = deque(maxlen=undo_limit)
+        self._sequence = 0
+        self._since_snapshot = 0
+        self._unsynced = 0
+        self._fsync_every = fsync_every
+        self._snapshot_every = snapshot_every
+        if path is not None:
+            torn = self._recover()
+            self._file = open(path, 'a', encoding='utf-8')
+            if torn:
+                # start a clean journal rather than append after the bad line
+                self.snapshot()
+
+    def add_recipe(self, recipe: tuple[str, str]) -> None:
+        """Adds a recipe to the end of the meal plan."""
+        self._apply({'op': 'add', 'recipe': list(recipe)})
+
+    def remove_recipe(self, name: str) -> tuple[str, str] | None:
+        """Removes the first recipe in the meal plan with the given name.
+
+        Returns:
+            The recipe removed, or None if there is none of that name.
+        """
+        if not any(recipe[0] == name for recipe in self.recipes):
+            return None
+        return self._apply({'op': 'rm', 'name': name})
+
+    def subtract(self, name: str, amount: float) -> bool:
+        """Takes an amount of an ingredient off the shopping list.
+
+        Returns:
+            False if the ingredient is not on the shopping list, else True.
+        """
+        if self.shopping_list.get_amount(name) is None:
+            return False
+        self._apply({'op': 'sub', 'name': name, 'amount': amount})
+        return True
+
+    def undo(self) -> bool:
+        """Reverses the most recent change that has not been undone.
+
+        Returns:
+            False if there was nothing to undo, otherwise True.
+        """
+        if len(self._undo) == 0:
+            return False
+        self._apply({'op': 'undo'})
+        return True
+
+    def _apply(self, change: dict):
+        """Makes a change to the state, records how to reverse it and
+        writes it to the journal.
+
+        Returns:
+            The recipe a rm change removed, otherwise None.
+        """
+        result = self._replay(change)
+        self._sequence += 1
+        if self._file is None:
+            return result
+        change['seq'] = self._sequence
+        self._file.write(json.dumps(change) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+        self._since_snapshot += 1
+        if self._since_snapshot >= self._snapshot_every:
+            self.snapshot()
+        elif self._unsynced >= self._fsync_every:
+            self.sync()
+        return result
+
+    def _replay(self, change: dict):
+        """Makes a change to the state and records how to reverse it,
+        without journalling it.
+        """
+        op = change['op']
+        if op == 'add':
+            recipe = tuple(change['recipe'])
+            # add_recipe parses every ingredient before adding any, so a bad
+            # recipe raises here and leaves the plan as it was
+            self.shopping_list.add_recipe(recipe)
+            self.recipes.append(recipe)
+            self._undo.append(('add',))
+        elif op == 'rm':
+            index = next(i for i, recipe in enumerate(self.recipes)
+                         if recipe[0] == change['name'])
+            recipe = self.recipes.pop(index)
+            self._undo.append(('rm', index, recipe,
+                               self._take_away(recipe)))
+            return recipe
+        elif op == 'sub':
+            before = self.shopping_list.get_amount(change['name'])
+            self.shopping_list.subtract((change['amount'], before[1],
+                                         change['name']))
+            self._undo.append(('sub', change['name'], before))
+        elif op == 'undo':
+            self._reverse(self._undo.pop())
+        return None
+
+    def _take_away(self, recipe: tuple[str, str]
+                   ) -> list[tuple[float, str, str]]:
+        """Takes a recipe's ingredients off the shopping list.
+
+        Returns:
+            The amount of each ingredient actually taken off, which is less
+            than the recipe's if rm -i had already taken some of it.
+        """
+        removed = []
+        shopping_list = self.shopping_list
+        for amount, measure, name in recipe_ingredients(recipe):
+            before = shopping_list.get_amount(name)
+            if before is None:
+                continue
+            shopping_list.subtract((amount, measure, name))
+            after = shopping_list.get_amount(name)
+            removed.append((before[0] - (0.0 if after is None else after[0]),
+                            before[1], name))
+        return removed
+
+    def _reverse(self, inverse: tuple) -> None:
+        """Reverses a change given the undo record made for it."""
+        if inverse[0] == 'add':
+            # the recipe added is still last, as changes are undone in order
+            self.shopping_list.remove_recipe(self.recipes.pop())
+        elif inverse[0] == 'rm':
+            _, index, recipe, removed = inverse
+            self.recipes.insert(index, recipe)
+            for ingredient_details in removed:
+                self.shopping_list.add(tuple(ingredient_details))
+        else:
+            _, name, (amount, measure) = inverse
+            now = self.shopping_list.get_amount(name)
+            self.shopping_list.add(
+                (amount - (0.0 if now is None else now[0]), measure, name))
+
+    def sync(self) -> None:
+        """Makes sure every journal line written so far is on disk."""
+        if self._file is not None and self._unsynced > 0:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def snapshot(self) -> None:
+        """Writes the whole state to the snapshot file and empties the
+        journal.
+
+        The snapshot is written to a temporary file and renamed over the old
+        one, and records the number of the last change it includes, so a
+        crash at any point leaves a snapshot and journal that recover to
+        the same state.
+        """
+        if self._path is None:
+            return
+        temporary = self._path + '.snapshot.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'seq': self._sequence,
+                       'recipes': self.recipes,
+                       'shopping_list': self.shopping_list.to_list(),
+                       'undo': list(self._undo)}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self._path + '.snapshot')
+        self._file.close()
+        self._file = open(self._path, 'w', encoding='utf-8')
+        os.fsync(self._file.fileno())
+        self._since_snapshot = 0
+        self._unsynced = 0
+
+    def _recover(self) -> bool:
+        """Loads the snapshot, if there is one, and replays the journal
+        lines written after it. A partly written last line is ignored.
+
+        Returns:
+            True if the journal ended in a partly written line.
+        """
+        try:
+            with open(self._path + '.snapshot', encoding='utf-8') as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            pass
+        else:
+            self._sequence = state['seq']
+            self.recipes = [tuple(recipe) for recipe in state['recipes']]
+            for amount, measure, name in state['shopping_list']:
+                self.shopping_list.add((amount, measure, name))
+            for inverse in state['undo']:
+                if inverse[0] == 'rm':
+                    inverse = ('rm', inverse[1], tuple(inverse[2]),
+                               [tuple(x) for x in inverse[3]])
+                self._undo.append(tuple(inverse))
+        try:
+            file = open(self._path, encoding='utf-8')
+        except FileNotFoundError:
+            return False
+        with file:
+            for line in file:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    return True
+                if change['seq'] <= self._sequence:
+                    continue
+                self._replay(change)
+                self._sequence = change['seq']
+                self._since_snapshot += 1
+        return False
+
+    def close(self) -> None:
+        """Syncs and closes the journal file."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
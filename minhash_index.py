@@ -0,0 +1,232 @@
+"""
+Near duplicate recipe detection for CSSE1001 Assignment 1.
+
+Bulk imported cook books often hold the same recipe several times under
+different names, with an ingredient or two changed. Comparing every pair of
+recipes is quadratic, so MinHashIndex instead gives each recipe a MinHash
+signature of its set of ingredient names: the smallest value of each of
+NUM_HASHES hash functions over the set. Two recipes agree on any one
+signature value with probability equal to the Jaccard similarity of their
+ingredient sets. The signature is cut into bands, and recipes that agree on
+every value of some band share a bucket, so similar recipes are found by
+looking in a few buckets. Candidates are then checked with their exact
+Jaccard similarity.
+
+With 16 bands of 4 rows, recipes with similarity 0.8 share a bucket 99.9%
+of the time, and recipes with similarity 0.3 only 12% of the time.
+"""
+
+import hashlib
+import heapq
+import random
+from a1 import recipe_ingredients
+
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+
+# Recipes less similar than this are not reported as near duplicates
+MIN_SIMILARITY = 0.6
+
+# Hash functions are (a * x + b) mod this prime
+_PRIME = (1 << 61) - 1
+
+
+def jaccard(first: frozenset, second: frozenset) -> float:
+    """
+    Return the Jaccard similarity of two sets, from 0 to 1.
+
+    >>> jaccard(frozenset({'peanuts', 'salt', 'oil'}),
+    ...         frozenset({'peanuts', 'salt'}))
+    0.6666666666666666
+    """
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def _base_hash(name: str) -> int:
+    """Returns a 61 bit hash of a name that is the same in every run."""
+    digest = hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % _PRIME
+
+
+class MinHashIndex():
+    """An LSH index of recipes by the MinHash signature of their
+    ingredient names.
+
+    Attributes:
+        _hashes: the (a, b) of each of the NUM_HASHES hash functions
+        _name_hashes: a dictionary of ingredient name to the tuple of its
+            value under each hash function
+        _ingredients: a dictionary of recipe name to its frozenset of
+            ingredient names
+        _signatures: a dictionary of recipe name to its signature tuple
+        _buckets: a dictionary per band of band values to the set of names
+            of the recipes with those values
+    """
+
+    def __init__(self, recipes: list[tuple[str, str]] | None = None,
+                 seed: int = 0) -> None:
+        """Initialises the index with the given recipes, if any.
+
+        Args:
+            recipes: recipes to index
+            seed: seeds the choice of hash functions
+
+        Returns:
+            None
+        """
+        rng = random.Random(seed)
+        self._hashes = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME))
+                        for _ in range(NUM_HASHES)]
+        self._name_hashes = {}
+        self._ingredients = {}
+        self._signatures = {}
+        self._buckets = [{} for _ in range(NUM_BANDS)]
+        if recipes is not None:
+            for recipe in recipes:
+                self.add(recipe)
+
+    def get_signature(self, ingredients: frozenset) -> tuple[int, ...]:
+        """Returns the MinHash signature of a set of ingredient names.
+        Each name is hashed by every hash function once, the first time it
+        is seen, so a signature is a column-wise minimum of cached tuples.
+        """
+        name_hashes = self._name_hashes
+        rows = []
+        for name in ingredients:
+            row = name_hashes.get(name)
+            if row is None:
+                x = _base_hash(name)
+                row = name_hashes[name] = tuple(
+                    (a * x + b) % _PRIME for a, b in self._hashes)
+            rows.append(row)
+        if not rows:
+            return (_PRIME,) * NUM_HASHES
+        return tuple(map(min, *rows)) if len(rows) > 1 else rows[0]
+
+    def _bands(self, signature: tuple[int, ...]):
+        """Returns each band's bucket dictionary with the band's values."""
+        return ((buckets, signature[band * ROWS_PER_BAND:
+                                    (band + 1) * ROWS_PER_BAND])
+                for band, buckets in enumerate(self._buckets))
+
+    def add(self, recipe: tuple[str, str]) -> None:
+        """Indexes a recipe, replacing any recipe of the same name."""
+        self.remove(recipe[0])
+        ingredients = frozenset(x[2] for x in recipe_ingredients(recipe))
+        signature = self.get_signature(ingredients)
+        self._ingredients[recipe[0]] = ingredients
+        self._signatures[recipe[0]] = signature
+        for buckets, key in self._bands(signature):
+            buckets.setdefault(key, set()).add(recipe[0])
+
+    def remove(self, name: str) -> None:
+        """Removes the recipe with the given name, if it is indexed."""
+        signature = self._signatures.pop(name, None)
+        if signature is None:
+            return
+        del self._ingredients[name]
+        for buckets, key in self._bands(signature):
+            bucket = buckets[key]
+            bucket.discard(name)
+            if not bucket:
+                del buckets[key]
+
+    def _candidates(self, signature: tuple[int, ...]) -> set[str]:
+        """Returns the names of the recipes sharing a bucket with a
+        signature.
+        """
+        candidates = set()
+        for buckets, key in self._bands(signature):
+            candidates.update(buckets.get(key, ()))
+        return candidates
+
+    def similar(self, recipe: str | tuple[str, str], limit: int = 5,
+                min_similarity: float = MIN_SIMILARITY
+                ) -> list[tuple[str, float]]:
+        """Returns up to limit of the recipes most like the given recipe
+        (or indexed recipe name), most similar first, with their Jaccard
+        similarity. The recipe itself is left out.
+
+        Examples:
+            >>> index = MinHashIndex([
+            ... ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil'),
+            ... ('nut butter', '250 g peanuts,1 tsp salt,1 tsp oil'),
+            ... ('toast', '2 slice bread')])
+            >>> index.similar('peanut butter')
+            [('nut butter', 1.0)]
+        """
+        if isinstance(recipe, str):
+            name = recipe
+            ingredients = self._ingredients.get(name)
+            if ingredients is None:
+                return []
+            signature = self._signatures[name]
+        else:
+            name = recipe[0]
+            ingredients = frozenset(x[2] for x in recipe_ingredients(recipe))
+            signature = self.get_signature(ingredients)
+        scored = []
+        for candidate in self._candidates(signature):
+            if candidate == name:
+                continue
+            score = jaccard(ingredients, self._ingredients[candidate])
+            if score >= min_similarity:
+                scored.append((candidate, score))
+        return heapq.nsmallest(limit, scored, key=lambda x: (-x[1], x[0]))
+
+    def duplicate_clusters(self, min_similarity: float = MIN_SIMILARITY
+                           ) -> list[list[str]]:
+        """Returns the groups of recipe names linked by a chain of pairs at
+        least min_similarity alike, largest group first. Only pairs sharing
+        a bucket are compared, so the work grows with the number of recipes
+        rather than the number of pairs, unless many recipes share one
+        bucket.
+
+        Examples:
+            >>> index = MinHashIndex([
+            ... ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil'),
+            ... ('nut butter', '250 g peanuts,1 tsp salt,1 tsp oil'),
+            ... ('toast', '2 slice bread')])
+            >>> index.duplicate_clusters()
+            [['nut butter', 'peanut butter']]
+        """
+        parents = {name: name for name in self._signatures}
+
+        def find(name: str) -> str:
+            root = name
+            while parents[root] != root:
+                root = parents[root]
+            while name != root:
+                parents[name], name = root, parents[name]
+            return root
+
+        compared = set()
+        for buckets in self._buckets:
+            for bucket in buckets.values():
+                if len(bucket) < 2:
+                    continue
+                members = sorted(bucket)
+                for i, first in enumerate(members):
+                    for second in members[i + 1:]:
+                        if (first, second) in compared \
+                                or find(first) == find(second):
+                            continue
+                        compared.add((first, second))
+                        if jaccard(self._ingredients[first],
+                                   self._ingredients[second]
+                                   ) >= min_similarity:
+                            parents[find(second)] = find(first)
+        clusters = {}
+        for name in parents:
+            clusters.setdefault(find(name), []).append(name)
+        return sorted((sorted(names) for names in clusters.values()
+                       if len(names) > 1), key=lambda x: (-len(x), x))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._signatures
+
+    def __len__(self) -> int:
+        return len(self._signatures)
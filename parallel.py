@@ -0,0 +1,69 @@
+"""
+Parallel shopping list generation for CSSE1001 Assignment 1.
+
+A meal plan is first collapsed into (recipe, multiplier) pairs with
+count_recipes, as generate_shopping_list does, so each distinct recipe is
+sent to a worker once however often it is planned. Plans with very many
+distinct recipes are split into contiguous shards of pairs, each shard is
+aggregated into an IngredientAggregate by a worker process, and the partial
+aggregates are merged in shard order. Merging in order keeps the ingredients
+in the same order as generate_shopping_list.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from a1 import (IngredientAggregate, count_recipes,
+                generate_meal_plan_shopping_list)
+
+# Meal plans with fewer distinct recipes than this are generated serially,
+# as starting worker processes and sending them the recipes costs more than
+# it saves
+PARALLEL_MIN_RECIPES = 20000
+
+
+def _aggregate_shard(meal_plan: list[tuple[tuple[str, str], float]],
+                     convert_units: bool) -> IngredientAggregate:
+    """Returns the aggregate of the ingredients of a shard of
+    (recipe, multiplier) pairs.
+    """
+    aggregate = IngredientAggregate(convert_units)
+    for recipe, multiplier in meal_plan:
+        aggregate.add_recipe(recipe, multiplier)
+    return aggregate
+
+
+def generate_shopping_list_parallel(recipes: list[tuple[str, str]],
+                                    workers: int | None = None,
+                                    convert_units: bool = False
+                                    ) -> list[tuple[float, str, str]]:
+    """
+    Return the same shopping list as generate_shopping_list(recipes,
+    convert_units), built across a pool of worker processes.
+
+    The totals match the serial path exactly whenever the amounts are exact
+    in binary floating point (as 0.5, 0.25, 300 and the like are); otherwise
+    they can differ in the last bit, as the sums are grouped by shard.
+    As with any ProcessPoolExecutor use, scripts calling this must guard
+    their entry point with if __name__ == '__main__'.
+
+    Parameters:
+        recipes: the meal plan
+        workers: number of worker processes, defaults to the number of CPUs
+        convert_units: see generate_shopping_list
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    meal_plan = count_recipes(recipes)
+    if workers < 2 or len(meal_plan) < PARALLEL_MIN_RECIPES:
+        return generate_meal_plan_shopping_list(meal_plan, convert_units)
+
+    shard_size = -(-len(meal_plan) // workers)
+    shards = [meal_plan[start:start + shard_size]
+              for start in range(0, len(meal_plan), shard_size)]
+    result = IngredientAggregate(convert_units)
+    with ProcessPoolExecutor(workers) as executor:
+        for partial in executor.map(_aggregate_shard, shards,
+                                    repeat(convert_units)):
+            result.merge(partial)
+    return result.to_list()
@@ -0,0 +1,155 @@
+"""
+Shopping list cache for CSSE1001 Assignment 1.
+
+Households generate shopping lists for the same, or nearly the same, meal
+plans again and again. ShoppingListCache remembers the totals of recent
+plans under a fingerprint of the plan's recipes that ignores their order.
+A plan that was seen before is answered from the cache, and one that differs
+from a cached plan by a few recipes is worked out from that plan's totals
+by adding and taking away just the recipes that changed.
+"""
+
+import hashlib
+from collections import OrderedDict
+from a1 import IngredientAggregate, count_recipes
+
+# Fingerprints are sums of recipe hashes modulo this
+_FINGERPRINT_MODULUS = 1 << 128
+
+
+def recipe_hash(recipe: tuple[str, str]) -> int:
+    """
+    Return a 128 bit hash of a recipe's name and ingredients, which is the
+    same in every run (unlike hash()).
+    """
+    digest = hashlib.blake2b(f'{recipe[0]}\0{recipe[1]}'.encode('utf-8'),
+                             digest_size=16).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def plan_fingerprint(counts: dict[int, int]) -> int:
+    """
+    Return the fingerprint of a meal plan given as recipe hash -> count.
+    The fingerprint is the sum of the hashes, counted with multiplicity, so
+    it does not depend on the order of the recipes.
+    """
+    return sum(count * recipe for recipe, count in counts.items()
+               ) % _FINGERPRINT_MODULUS
+
+
+class ShoppingListCache():
+    """A bounded cache of meal plan totals, keyed by plan fingerprint.
+
+    Lists derived from a cached plan have the same totals as
+    generate_shopping_list (up to floating point rounding), but ingredients
+    that were taken away and added back may be listed in a different order.
+
+    Attributes:
+        _maxsize: the most plans to remember
+        _max_delta: the largest fraction of a plan's distinct recipes that
+            may differ from a cached plan for it to be derived from it
+        _convert_units: see generate_shopping_list
+        _plans: an OrderedDict of fingerprint to (recipe hash -> count,
+            recipe hash -> recipe, IngredientAggregate), least recently
+            used first
+        hits: number of plans answered straight from the cache
+        derived: number of plans worked out from a cached plan
+        misses: number of plans totalled from scratch
+    """
+
+    def __init__(self, maxsize: int = 32, max_delta: float = 0.5,
+                 convert_units: bool = False) -> None:
+        """Initialises an empty cache.
+
+        Args:
+            maxsize: the most plans to remember
+            max_delta: the largest fraction of distinct recipes that may
+                differ for a plan to be derived from a cached one
+            convert_units: see generate_shopping_list
+
+        Returns:
+            None
+        """
+        self._maxsize = maxsize
+        self._max_delta = max_delta
+        self._convert_units = convert_units
+        self._plans = OrderedDict()
+        self.hits = 0
+        self.derived = 0
+        self.misses = 0
+
+    def generate_shopping_list(self, recipes: list[tuple[str, str]]
+                               ) -> list[tuple[float, str, str]]:
+        """Returns the shopping list of a list of recipes, using or filling
+        the cache.
+
+        Examples:
+            >>> cache = ShoppingListCache()
+            >>> toast, tea = ('toast', '2 slice bread'), ('tea', '1 bag tea')
+            >>> cache.generate_shopping_list([toast, tea])
+            [(2.0, 'slice', 'bread'), (1.0, 'bag', 'tea')]
+            >>> cache.generate_shopping_list([tea, toast, toast])
+            [(4.0, 'slice', 'bread'), (1.0, 'bag', 'tea')]
+            >>> cache.hits, cache.derived, cache.misses
+            (0, 1, 1)
+        """
+        counts = {}
+        by_hash = {}
+        for recipe, count in count_recipes(recipes):
+            key = recipe_hash(recipe)
+            counts[key] = counts.get(key, 0) + count
+            by_hash[key] = recipe
+        fingerprint = plan_fingerprint(counts)
+
+        cached = self._plans.get(fingerprint)
+        if cached is not None and cached[0] == counts:
+            self._plans.move_to_end(fingerprint)
+            self.hits += 1
+            return cached[2].to_list()
+
+        aggregate = self._derive(counts, by_hash)
+        if aggregate is None:
+            self.misses += 1
+            aggregate = IngredientAggregate(self._convert_units)
+            for key, count in counts.items():
+                aggregate.add_recipe(by_hash[key], count)
+        else:
+            self.derived += 1
+        self._plans[fingerprint] = (counts, by_hash, aggregate)
+        self._plans.move_to_end(fingerprint)
+        if len(self._plans) > self._maxsize:
+            self._plans.popitem(last=False)
+        return aggregate.to_list()
+
+    def _derive(self, counts: dict[int, int],
+                by_hash: dict[int, tuple[str, str]]
+                ) -> IngredientAggregate | None:
+        """Returns the totals of a plan worked out from the closest cached
+        plan, or None if no cached plan is close enough.
+        """
+        best = None
+        best_delta = self._max_delta * len(counts)
+        for cached_counts, cached_by_hash, aggregate in self._plans.values():
+            delta = sum(1 for key in counts.keys() | cached_counts.keys()
+                        if counts.get(key, 0) != cached_counts.get(key, 0))
+            if delta <= best_delta:
+                best = (cached_counts, cached_by_hash, aggregate)
+                best_delta = delta
+        if best is None:
+            return None
+        cached_counts, cached_by_hash, aggregate = best
+        aggregate = aggregate.copy()
+        for key in counts.keys() | cached_counts.keys():
+            change = counts.get(key, 0) - cached_counts.get(key, 0)
+            if change > 0:
+                aggregate.add_recipe(by_hash[key], change)
+            elif change < 0:
+                aggregate.remove_recipe(cached_by_hash[key], -change)
+        return aggregate
+
+    def clear(self) -> None:
+        """Forgets every cached plan."""
+        self._plans.clear()
+
+    def __len__(self) -> int:
+        return len(self._plans)
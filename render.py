@@ -0,0 +1,154 @@
+"""
+Shopping list output for CSSE1001 Assignment 1.
+
+Writes a shopping list of (amount, measure, ingredient) tuples to a stream
+as the assignment's table, or as CSV, JSON or Markdown. The list passed in
+is never changed: rows are sorted into a new list (or only the first rows
+of the page are picked out), column widths are found in one pass over the
+rows being written, and lines are written to the stream in large chunks.
+"""
+
+import csv
+import heapq
+import json
+import sys
+from itertools import chain
+
+# Number of lines joined into each write to the stream
+LINES_PER_WRITE = 4096
+
+
+def select_rows(shopping_list: list[tuple[float, str, str]], limit: int | None = None,
+                offset: int = 0) -> list[tuple[float, str, str]]:
+    """
+    Return the rows of a shopping list from offset to offset + limit when
+    sorted by ingredient name, without changing the list. Only the rows
+    needed are sorted when a limit is given.
+
+    >>> select_rows([(1.0, 'g', 'b'), (2.0, 'g', 'c'), (3.0, 'g', 'a')], 2)
+    [(3.0, 'g', 'a'), (1.0, 'g', 'b')]
+    """
+    if limit is None:
+        rows = sorted(shopping_list, key=lambda x: x[2])
+    else:
+        rows = heapq.nsmallest(offset + limit, shopping_list,
+                               key=lambda x: x[2])
+    return rows[offset:] if offset else rows
+
+
+def _write_lines(lines, stream) -> None:
+    """Writes lines to the stream, LINES_PER_WRITE lines at a time."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == LINES_PER_WRITE:
+            stream.write('\n'.join(chunk) + '\n')
+            chunk.clear()
+    if chunk:
+        stream.write('\n'.join(chunk) + '\n')
+
+
+def _table_lines(rows: list[tuple[float, str, str]]):
+    """Yields the lines of the assignment's table of the rows."""
+    amounts = [str(row[0]) for row in rows]
+    longest_amount = longest_measure = longest_ingredient = 0
+    for amount, row in zip(amounts, rows):
+        longest_amount = max(longest_amount, len(amount))
+        longest_measure = max(longest_measure, len(row[1]))
+        longest_ingredient = max(longest_ingredient, len(row[2]))
+    for amount, (_, measure, ingredient) in zip(amounts, rows):
+        # measures are centred, with any odd space on the left
+        space = longest_measure - len(measure)
+        left = space - space // 2
+        yield (f'| {amount.rjust(longest_amount)} | '
+               f'{" " * left}{measure}{" " * (space - left)}  | '
+               f'{ingredient.ljust(longest_ingredient)}  |')
+
+
+def render_table(shopping_list: list[tuple[float, str, str]], stream=None,
+                 limit: int | None = None, offset: int = 0) -> None:
+    """
+    Write a shopping list as the assignment's table, sorted by ingredient.
+
+    >>> render_table([(1.0, 'large', 'banana'), (240.0, 'ml', 'almond milk')])
+    | 240.0 |   ml   | almond milk  |
+    |   1.0 | large  | banana       |
+    """
+    _write_lines(_table_lines(select_rows(shopping_list, limit, offset)),
+                 stream or sys.stdout)
+
+
+def render_csv(shopping_list: list[tuple[float, str, str]], stream=None,
+               limit: int | None = None, offset: int = 0) -> None:
+    """
+    Write a shopping list as CSV with an amount,measure,ingredient header.
+    """
+    writer = csv.writer(stream or sys.stdout, lineterminator='\n')
+    writer.writerow(('amount', 'measure', 'ingredient'))
+    writer.writerows(select_rows(shopping_list, limit, offset))
+
+
+def render_json(shopping_list: list[tuple[float, str, str]], stream=None,
+                limit: int | None = None, offset: int = 0) -> None:
+    """
+    Write a shopping list as a JSON array of objects, one per line.
+
+    >>> render_json([(1.0, 'large', 'banana')])
+    [
+    {"amount": 1.0, "measure": "large", "ingredient": "banana"}
+    ]
+    """
+    rows = select_rows(shopping_list, limit, offset)
+    last = len(rows) - 1
+    lines = (json.dumps({'amount': amount, 'measure': measure,
+                         'ingredient': ingredient})
+             + (',' if index < last else '')
+             for index, (amount, measure, ingredient) in enumerate(rows))
+    stream = stream or sys.stdout
+    stream.write('[\n')
+    _write_lines(lines, stream)
+    stream.write(']\n')
+
+
+def render_markdown(shopping_list: list[tuple[float, str, str]], stream=None,
+                    limit: int | None = None, offset: int = 0) -> None:
+    """
+    Write a shopping list as a Markdown table.
+
+    >>> render_markdown([(1.0, 'large', 'banana')])
+    | Amount | Measure | Ingredient |
+    | ---: | :---: | :--- |
+    | 1.0 | large | banana |
+    """
+    def escape(text: str) -> str:
+        return text.replace('|', '\\|')
+
+    header = ['| Amount | Measure | Ingredient |', '| ---: | :---: | :--- |']
+    rows = (f'| {amount} | {escape(measure)} | {escape(ingredient)} |'
+            for amount, measure, ingredient
+            in select_rows(shopping_list, limit, offset))
+    _write_lines(chain(header, rows), stream or sys.stdout)
+
+
+# Output format name -> function that writes it
+FORMATS = {
+    'table': render_table,
+    'csv': render_csv,
+    'json': render_json,
+    'markdown': render_markdown,
+}
+
+
+def render_shopping_list(shopping_list: list[tuple[float, str, str]],
+                         output_format: str = 'table', stream=None,
+                         limit: int | None = None, offset: int = 0) -> None:
+    """
+    Write a page of a shopping list to a stream (standard output by default)
+    in one of the FORMATS.
+
+    Raises:
+        ValueError: if output_format is not one of the FORMATS.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f'unknown output format {output_format!r}')
+    FORMATS[output_format](shopping_list, stream, limit, offset)
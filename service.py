@@ -0,0 +1,352 @@
+"""
+JSON over HTTP service for CSSE1001 Assignment 1.
+
+Serves the cook book and shopping list functions to many clients at once
+from a single asyncio event loop, using only the standard library. Requests
+are small HTTP/1.1 messages with JSON bodies, and connections are kept open
+between requests. The cook book is only changed from the event loop, so it
+needs no locks. Shopping lists for large meal plans are totalled in a pool
+of worker processes so they do not hold up other clients. Smaller plans
+are answered from a plan_cache.ShoppingListCache, so a plan asked for again,
+or one a few recipes away from a recent plan, is not totalled from scratch.
+On an SQLite cook book, shopping lists without unit conversion are instead
+totalled by the database (see cookbook_store.SQLiteCookbook).
+
+    GET    /recipes                      names of every recipe
+    GET    /recipes?ingredients=a,b      names of recipes using all of a, b
+    GET    /recipes/{name}               {"name": ..., "ingredients": ...}
+    POST   /recipes                      add {"name": ..., "ingredients": ...}
+    DELETE /recipes/{name}               remove a recipe
+    POST   /shopping-list                {"recipes": [name, ...],
+                                          "convert_units": false}
+    POST   /pantry/net                   {"recipes": [name, ...],
+                                          "pantry": [[amount, measure,
+                                                      ingredient], ...]}
+    POST   /pantry/cook                  {"ingredients": [...], "limit": 10}
+
+Run with: python service.py [--host HOST] [--port PORT] [cookbook.sqlite]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+from a1 import (generate_shopping_list, net_shopping_list,
+                normalise_recipe_name, validate_recipe)
+from plan_cache import ShoppingListCache
+from session import load_cookbook
+
+# Meal plans with at least this many recipes are totalled in the worker pool
+OFFLOAD_MIN_RECIPES = 2000
+
+# Limits on the size of a request
+MAX_HEADER_LINES = 100
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+_REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large',
+            500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """A request that cannot be answered, with the HTTP status to send."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class RecipeService():
+    """Answers requests against a cook book.
+
+    Each route is a method, looked up in ROUTES by the request method and
+    path, so answering a request is one or two dictionary lookups.
+
+    Attributes:
+        _recipe_collection: the cook book
+        _executor: the process pool large meal plans are totalled in, or
+            None to total them in the event loop
+        _shopping_lists: a dictionary of convert_units to the
+            ShoppingListCache of the shopping lists totalled in the event
+            loop
+    """
+
+    def __init__(self, recipe_collection, executor=None) -> None:
+        """Initialises the service.
+
+        Args:
+            recipe_collection: the cook book (a Cookbook or
+                cookbook_store.SQLiteCookbook)
+            executor: the process pool large meal plans are totalled in;
+                create it with a forkserver or spawn context, as forking
+                from a running event loop can deadlock
+
+        Returns:
+            None
+        """
+        self._recipe_collection = recipe_collection
+        self._executor = executor
+        self._shopping_lists = {
+            convert_units: ShoppingListCache(convert_units=convert_units)
+            for convert_units in (False, True)}
+
+    async def handle(self, method: str, target: str,
+                     body: bytes) -> tuple[int, object]:
+        """Returns the status and JSON payload answering a request."""
+        url = urlsplit(target)
+        parts = [unquote(x) for x in url.path.split('/') if x != '']
+        if parts == []:
+            raise RequestError(404, 'no such resource')
+        # e.g. /recipes/brownie is answered by the /recipes/* route
+        paths = ['/' + '/'.join(parts), '/' + '/'.join(parts[:-1] + ['*'])]
+        route = self.ROUTES.get((method, paths[0])) \
+            or self.ROUTES.get((method, paths[1]))
+        if route is None:
+            if any(path in paths for _, path in self.ROUTES):
+                raise RequestError(405, f'{method} not allowed')
+            raise RequestError(404, f'no such resource {url.path!r}')
+        data = None
+        if body != b'':
+            try:
+                data = json.loads(body)
+            except (UnicodeDecodeError, json.JSONDecodeError) as error:
+                raise RequestError(400, f'invalid JSON: {error}') from None
+        return await route(self, parts[-1], parse_qs(url.query), data)
+
+    async def _list_recipes(self, name, query, data):
+        if 'ingredients' not in query:
+            return 200, [recipe[0] for recipe in self._recipe_collection]
+        ingredients = [x.strip() for value in query['ingredients']
+                       for x in value.split(',') if x.strip() != '']
+        index = self._recipe_collection.get_index()
+        return 200, sorted(index.recipes_with_all(ingredients))
+
+    async def _get_recipe(self, name, query, data):
+        recipe = self._recipe_collection.get_recipe(
+            normalise_recipe_name(name))
+        if recipe is None:
+            raise RequestError(404, f'no recipe {name!r}')
+        return 200, {'name': recipe[0], 'ingredients': recipe[1]}
+
+    async def _add_recipe(self, name, query, data):
+        recipe = (normalise_recipe_name(_field(data, 'name', str)),
+                  _field(data, 'ingredients', str))
+        error = validate_recipe(recipe)
+        if error is not None:
+            raise RequestError(400, error)
+        self._recipe_collection.append(recipe)
+        return 201, {'name': recipe[0], 'ingredients': recipe[1]}
+
+    async def _remove_recipe(self, name, query, data):
+        name = normalise_recipe_name(name)
+        if self._recipe_collection.remove_name(name) is None:
+            raise RequestError(404, f'no recipe {name!r}')
+        return 200, {'removed': name}
+
+    async def _shopping_list(self, name, query, data):
+        convert_units = bool(_field(data, 'convert_units', bool, False))
+        if not convert_units \
+                and hasattr(self._recipe_collection, 'generate_shopping_list'):
+            return 200, self._recipe_collection.generate_shopping_list(
+                self._meal_plan_names(data))
+        recipes = self._meal_plan(data)
+        if self._executor is None or len(recipes) < OFFLOAD_MIN_RECIPES:
+            cache = self._shopping_lists[convert_units]
+            return 200, cache.generate_shopping_list(recipes)
+        return 200, await self._offload(recipes, generate_shopping_list,
+                                        recipes, convert_units)
+
+    async def _net_shopping_list(self, name, query, data):
+        recipes = self._meal_plan(data)
+        try:
+            pantry = [(float(amount), str(measure), str(ingredient))
+                      for amount, measure, ingredient
+                      in _field(data, 'pantry', list)]
+        except (TypeError, ValueError):
+            raise RequestError(400, 'pantry items must be '
+                                    '[amount, measure, ingredient]') from None
+        convert_units = bool(_field(data, 'convert_units', bool, True))
+        return 200, await self._offload(recipes, net_shopping_list,
+                                        recipes, pantry, convert_units)
+
+    async def _cook(self, name, query, data):
+        ingredients = _field(data, 'ingredients', list)
+        limit = _field(data, 'limit', int, 10)
+        index = self._recipe_collection.get_index()
+        return 200, [{'name': name, 'uses': used, 'missing': missing}
+                     for name, used, missing
+                     in index.cook_from_pantry([str(x) for x in ingredients],
+                                               limit)]
+
+    def _meal_plan_names(self, data) -> list[str]:
+        """Returns the normalised recipe names in a request's "recipes"
+        field, checking that each is in the cook book.
+        """
+        names = [normalise_recipe_name(str(name))
+                 for name in _field(data, 'recipes', list)]
+        for name in set(names):
+            if name not in self._recipe_collection:
+                raise RequestError(404, f'no recipe {name!r}')
+        return names
+
+    def _meal_plan(self, data) -> list[tuple[str, str]]:
+        """Returns the recipes named in a request's "recipes" field."""
+        recipes = []
+        for name in _field(data, 'recipes', list):
+            recipe = self._recipe_collection.get_recipe(
+                normalise_recipe_name(str(name)))
+            if recipe is None:
+                raise RequestError(404, f'no recipe {name!r}')
+            recipes.append(recipe)
+        return recipes
+
+    async def _offload(self, recipes, function, *args):
+        """Returns function(*args), run in the worker pool if the meal plan
+        is large enough to be worth sending there.
+        """
+        if self._executor is None or len(recipes) < OFFLOAD_MIN_RECIPES:
+            return function(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    # (method, path) -> method answering it; * matches a recipe name
+    ROUTES = {
+        ('GET', '/recipes'): _list_recipes,
+        ('GET', '/recipes/*'): _get_recipe,
+        ('POST', '/recipes'): _add_recipe,
+        ('DELETE', '/recipes/*'): _remove_recipe,
+        ('POST', '/shopping-list'): _shopping_list,
+        ('POST', '/pantry/net'): _net_shopping_list,
+        ('POST', '/pantry/cook'): _cook,
+    }
+
+
+def _field(data, name: str, kind: type, default=None):
+    """Returns a field of a JSON object request body, checking its type.
+    The field is required unless a default is given.
+    """
+    if not isinstance(data, dict):
+        raise RequestError(400, 'expected a JSON object')
+    if name not in data:
+        if default is None:
+            raise RequestError(400, f'missing field {name!r}')
+        return default
+    value = data[name]
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise RequestError(400, f'{name!r} must be a {kind.__name__}')
+    return value
+
+
+async def _read_request(reader: asyncio.StreamReader
+                        ) -> tuple[str, str, dict[str, str], bytes] | None:
+    """Reads one request from a connection.
+
+    Returns:
+        The method, target, headers (with lower case names) and body, or
+        None if the client closed the connection.
+    """
+    request_line = await reader.readline()
+    if request_line.strip() == b'':
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise RequestError(400, 'malformed request line') from None
+    headers = {'http-version': version}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise RequestError(400, 'too many headers')
+    try:
+        length = int(headers.get('content-length', '0'))
+    except ValueError:
+        raise RequestError(400, 'bad Content-Length') from None
+    if length < 0 or length > MAX_BODY_BYTES:
+        raise RequestError(413, 'request body too large')
+    return method, target, headers, await reader.readexactly(length)
+
+
+def _response(status: int, payload, keep_alive: bool) -> bytes:
+    """Returns an HTTP response with a JSON body."""
+    body = json.dumps(payload).encode('utf-8')
+    return (f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+            f'\r\n').encode('latin-1') + body
+
+
+async def _serve_connection(service: RecipeService,
+                            reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+    """Answers the requests on one connection until either side closes it."""
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (
+                    headers['http-version'] != 'HTTP/1.0'
+                    or connection == 'keep-alive')
+                status, payload = await service.handle(method, target, body)
+            except RequestError as error:
+                status, payload = error.status, {'error': str(error)}
+            except asyncio.IncompleteReadError:
+                break
+            except Exception as error:
+                status, payload = 500, {'error': repr(error)}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service: RecipeService, host: str = '127.0.0.1',
+                port: int = 8080) -> asyncio.Server:
+    """
+    Return a started asyncio server answering requests with service.
+    Use port 0 to pick a free port, found from server.sockets.
+    """
+    return await asyncio.start_server(
+        lambda reader, writer: _serve_connection(service, reader, writer),
+        host, port, backlog=1024)
+
+
+async def _main(args) -> None:
+    """Serves the cook book until interrupted."""
+    # workers forked from the running event loop can inherit held locks
+    context = multiprocessing.get_context('forkserver')
+    with ProcessPoolExecutor(args.workers, mp_context=context) as executor:
+        service = RecipeService(load_cookbook(args.cookbook), executor)
+        server = await serve(service, args.host, args.port)
+        print(f'Serving on http://{args.host}:{args.port}/')
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recipe JSON service.')
+    parser.add_argument('cookbook', nargs='?',
+                        help='SQLite file to keep the cook book in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int,
+                        help='worker processes for large meal plans')
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
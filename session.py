@@ -0,0 +1,367 @@
+"""
+Shopping list commands for CSSE1001 Assignment 1.
+
+ShoppingSession runs the commands of the shopping list program, main runs
+them as they are typed in, and run_script runs them from a file. The
+recipe and shopping list functions they use are in a1.py. Running a1.py
+runs this module.
+
+    python session.py [cookbook.sqlite] [--script FILE] [--journal FILE]
+"""
+
+import argparse
+import io
+import sys
+from a1 import (DEFAULT_RECIPES, Cookbook, IngredientIndex, create_recipe,
+                find_recipe, import_recipes, normalise_recipe_name,
+                sanitise_command, validate_recipe)
+from cookbook_store import SQLiteCookbook
+from journal import SessionJournal
+from render import FORMATS, render_shopping_list, render_table
+from trigram_index import TrigramIndex
+
+HELP_TEXT = ('    H or h: Help\n'
+             '    mkrec: creates a recipe, add to cook book.\n'
+             '    import {file}: adds the recipes in a .csv or .jsonl file to cook book.\n'
+             '    add {recipe}: adds a recipe to the collection.\n'
+             '    find {ingredient}, ...: lists cook book recipes using all the ingredients.\n'
+             '    cook {ingredient}, ...: suggests recipes that use the most of a pantry.\n'
+             '    rm {recipe}: removes a recipe from the collection.\n'
+             '    rm -i {ingredient_name} {amount}: removes ingredient from shopping list.\n'
+             '    undo: undoes the last add or rm.\n'
+             '    ls: list all recipes in shopping cart.\n'
+             '    ls -a: list all available recipes in cook book.\n'
+             '    ls -s: display shopping list.\n'
+             '    ls -s {format}: display shopping list as csv, json or markdown.\n'
+             '    g or G: generates a shopping list.\n'
+             '    Q or q: Quit.')
+
+
+class ShoppingSession():
+    """The state of one run of the shopping list commands, and the commands
+    themselves.
+
+    Each command is a method, looked up in COMMANDS by the sanitised first
+    word of the entry, so running a command is one dictionary lookup.
+    Output goes to a stream, so a batch of commands can be buffered.
+    The meal plan and shopping list are changed through a
+    journal.SessionJournal, which can undo changes and keep them on disk.
+
+    Attributes:
+        _recipe_collection: the cook book
+        _journal: the SessionJournal holding the meal plan (its recipes) and
+            an IngredientAggregate of the meal plan (its shopping_list)
+        _stream: where output is written
+        _read_line: called with a prompt to read a line for mkrec
+    """
+
+    def __init__(self, recipe_collection, stream=None, read_line=input,
+                 journal=None) -> None:
+        """Initialises a session with the journal's meal plan, or an empty
+        one.
+
+        Args:
+            recipe_collection: the cook book (a Cookbook, list or
+                cookbook_store.SQLiteCookbook)
+            stream: where output is written, standard output by default
+            read_line: called with a prompt to read a line for mkrec
+            journal: a journal.SessionJournal, by default one that keeps
+                nothing on disk
+
+        Returns:
+            None
+        """
+        if journal is None:
+            journal = SessionJournal()
+        self._recipe_collection = recipe_collection
+        self._journal = journal
+        self._stream = stream or sys.stdout
+        self._read_line = read_line
+
+    def get_shopping_list(self) -> list[tuple[float, str, str]]:
+        """Returns the current shopping list."""
+        return self._journal.shopping_list.to_list()
+
+    def close(self) -> None:
+        """Closes the session's journal."""
+        self._journal.close()
+
+    def run_command(self, entry: str) -> str | None:
+        """Runs one command entry, e.g. 'add peanut butter'. A command that
+        raises an error is reported as failed, so one bad command does not
+        end the session.
+
+        Returns:
+            None if the command succeeded, otherwise a description of what
+            went wrong.
+        """
+        command = sanitise_command(entry.split(' ')[0])
+        handler = self.COMMANDS.get(command)
+        if handler is None:
+            return f'unknown command {command!r}'
+        try:
+            return handler(self, entry, ' '.join(entry.split(' ')[1:]))
+        except Exception as error:
+            self._print(f'Could not run {command}: {error}')
+            return f'{command} failed: {error!r}'
+
+    def _get_index(self):
+        """Returns the cook book's ingredient index. A plain list of
+        recipes has none, so one is built from it.
+        """
+        if hasattr(self._recipe_collection, 'get_index'):
+            return self._recipe_collection.get_index()
+        return IngredientIndex(self._recipe_collection)
+
+    def _get_name_index(self) -> TrigramIndex:
+        """Returns a TrigramIndex of the cook book's recipe names, built
+        from a plain list of recipes if need be.
+        """
+        if hasattr(self._recipe_collection, 'get_name_index'):
+            return self._recipe_collection.get_name_index()
+        return TrigramIndex(x[0] for x in self._recipe_collection)
+
+    def _print(self, *values) -> None:
+        """Prints to the session's stream."""
+        print(*values, file=self._stream)
+
+    def _help(self, entry: str, arguments: str) -> None:
+        self._print(HELP_TEXT)
+
+    def _make_recipe(self, entry: str, arguments: str) -> str | None:
+        recipe = create_recipe(self._read_line)
+        recipe = (normalise_recipe_name(recipe[0]), recipe[1])
+        error = validate_recipe(recipe)
+        if error is not None:
+            self._print(f'Recipe not created: {error}')
+            return error
+        self._recipe_collection.append(recipe)
+
+    def _import(self, entry: str, arguments: str) -> str | None:
+        filename = arguments.strip()
+        try:
+            loaded, failed, errors = import_recipes(filename,
+                                                    self._recipe_collection)
+        except OSError as error:
+            self._print(f'Could not read {filename}: {error.strerror}')
+            return f'could not read {filename}'
+        for line_number, error in errors:
+            self._print(f'Line {line_number}: {error}')
+        self._print(f'Imported {loaded} recipes, {failed} malformed lines.')
+
+    def _add(self, entry: str, arguments: str) -> str | None:
+        recipe_name = normalise_recipe_name(arguments)
+        recipe = find_recipe(recipe_name, self._recipe_collection)
+        if recipe is None:
+            suggestions = self._get_name_index().search(recipe_name, 3)
+            self._print('\nRecipe does not exist in the cook book.')
+            if suggestions != []:
+                self._print('Did you mean: '
+                            + ', '.join(name for name, score in suggestions)
+                            + '?')
+            self._print('Use the mkrec command to create a new recipe.\n')
+            return f'no recipe {recipe_name!r}'
+        error = validate_recipe(recipe)
+        if error is not None:
+            self._print(f'Recipe {recipe_name} can not be added: {error}')
+            return error
+        self._journal.add_recipe(recipe)
+
+    def _find(self, entry: str, arguments: str) -> None:
+        index = self._get_index()
+        matches = sorted(index.recipes_with_all(_split_ingredients(arguments)))
+        self._print_matches(matches)
+
+    def _cook(self, entry: str, arguments: str) -> None:
+        index = self._get_index()
+        self._print_matches([
+            f'{name} (uses {used}, needs {missing} more)'
+            for name, used, missing
+            in index.cook_from_pantry(_split_ingredients(arguments))])
+
+    def _print_matches(self, matches: list[str]) -> None:
+        if matches == []:
+            self._print('No recipes found.')
+        for match in matches:
+            self._print(match)
+
+    def _remove(self, entry: str, arguments: str) -> str | None:
+        removals = arguments.split(' ')
+        if removals[0] != '-i':
+            #remove recipe
+            recipe_name = normalise_recipe_name(' '.join(removals))
+            if self._journal.remove_recipe(recipe_name) is None:
+                return f'no recipe {recipe_name!r} in the meal plan'
+            return None
+        #remove ingredients
+        ingredient_name = ' '.join(removals[1:-1])
+        try:
+            amount = float(removals[-1])
+        except ValueError:
+            return f'bad amount {removals[-1]!r}'
+        if not self._journal.subtract(ingredient_name, amount):
+            return f'no ingredient {ingredient_name!r} in the shopping list'
+
+    def _undo(self, entry: str, arguments: str) -> str | None:
+        if not self._journal.undo():
+            return 'nothing to undo'
+
+    def _list(self, entry: str, arguments: str) -> str | None:
+        option = arguments.strip()
+        if option == '':
+            if self._journal.recipes == []:
+                self._print('No recipe in meal plan yet.')
+            else:
+                self._print(self._journal.recipes)
+        elif option == '-a':
+            for x in self._recipe_collection:
+                self._print(x[0])
+        elif option == '-s':
+            render_table(self._journal.shopping_list.to_list(), self._stream)
+        elif option.startswith('-s ') and option[3:].strip() in FORMATS:
+            render_shopping_list(self._journal.shopping_list.to_list(),
+                                 option[3:].strip(), self._stream)
+        else:
+            return f'unknown option {option!r}'
+
+    def _generate(self, entry: str, arguments: str) -> None:
+        render_table(self._journal.shopping_list.to_list(), self._stream)
+
+    # sanitised command word -> method that runs it
+    COMMANDS = {
+        'h': _help,
+        'mkrec': _make_recipe,
+        'import': _import,
+        'add': _add,
+        'find': _find,
+        'cook': _cook,
+        'rm': _remove,
+        'undo': _undo,
+        'ls': _list,
+        'g': _generate,
+    }
+
+
+def _split_ingredients(arguments: str) -> list[str]:
+    """Returns the comma separated ingredient names in a command's
+    arguments.
+    """
+    return [x.strip() for x in arguments.split(',') if x.strip() != '']
+
+
+def load_cookbook(cookbook_filename: str | None = None):
+    """
+    Return the cook book: the default recipes in a Cookbook, or the SQLite
+    cook book in cookbook_filename (seeded with the default recipes if it
+    is empty).
+    """
+    if cookbook_filename is None:
+        return Cookbook(DEFAULT_RECIPES)
+    recipe_collection = SQLiteCookbook(cookbook_filename)
+    if len(recipe_collection) == 0:
+        recipe_collection.extend(DEFAULT_RECIPES)
+    return recipe_collection
+
+
+def run_script(lines, recipe_collection, stream=None, errors=None,
+               journal=None) -> int:
+    """
+    Run the commands in an iterable of lines without prompting, as main()
+    would run them if they were typed in. The lines after mkrec are read as
+    its answers. All output is collected and written to stream (standard
+    output by default) at the end. Each failed command is reported to
+    errors (standard error by default) with its line number. The meal plan
+    is kept in journal (a journal.SessionJournal) if one is given.
+
+    Returns:
+        0 if every command succeeded, otherwise 1.
+    """
+    buffer = io.StringIO()
+    lines = (line.rstrip('\r\n') for line in lines)
+    line_number = 0
+
+    def read_line(prompt: str) -> str:
+        nonlocal line_number
+        line_number += 1
+        return next(lines, '')
+
+    session = ShoppingSession(recipe_collection, buffer, read_line, journal)
+    failures = 0
+    errors = errors or sys.stderr
+    for entry in lines:
+        line_number += 1
+        if entry.strip() == '' or entry.lstrip().startswith('#'):
+            continue
+        if sanitise_command(entry.split(' ')[0]) == 'q':
+            break
+        error = session.run_command(entry)
+        if error is not None:
+            failures += 1
+            print(f'line {line_number}: {error}', file=errors)
+    session.close()
+    (stream or sys.stdout).write(buffer.getvalue())
+    return 0 if failures == 0 else 1
+
+
+def main(cookbook_filename: str | None = None,
+         journal_filename: str | None = None):
+    """
+    Run the shopping list command loop. If cookbook_filename is given the
+    cook book is kept in that SQLite database, so it persists between runs.
+    If journal_filename is given the meal plan is journalled to that file,
+    and picked up from it again on the next run (or after a crash).
+
+    H or h: Help
+    mkrec: creates a recipe, add to cook book.
+    import {file}: adds the recipes in a .csv or .jsonl file to cook book.
+    add {recipe}: adds a recipe to the collection.
+    find {ingredient}, ...: lists cook book recipes using all the ingredients.
+    cook {ingredient}, ...: suggests recipes that use the most of a pantry.
+    rm {recipe}: removes a recipe from the collection.
+    rm -i {ingredient_name} {amount}: removes ingredient from shopping list.
+    undo: undoes the last add or rm.
+    ls: list all recipes in shopping cart.
+    ls -a: list all available recipes in cook book.
+    ls -s: display shopping list.
+    ls -s {format}: display shopping list as csv, json or markdown.
+    g or G: generates a shopping list.
+    Q or q: Quit.
+
+    """
+    # cook book
+    recipe_collection = load_cookbook(cookbook_filename)
+    
+    # Write the rest of your code here
+    #initiating varibles
+    command = ''
+    session = ShoppingSession(recipe_collection,
+                              journal=SessionJournal(journal_filename))
+    while command != 'q':
+        entry = input('Please enter a command: ')
+        command = sanitise_command(entry.split(' ')[0])
+        if command != 'q':
+            session.run_command(entry)
+    session.close()
+
+    
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Recipe shopping lists.')
+    parser.add_argument('cookbook', nargs='?',
+                        help='SQLite file to keep the cook book in')
+    parser.add_argument('--script', metavar='FILE',
+                        help='run the commands in FILE (- for standard input)'
+                             ' instead of prompting for them')
+    parser.add_argument('--journal', metavar='FILE',
+                        help='journal the meal plan to FILE, recovering it'
+                             ' from there on the next run')
+    args = parser.parse_args()
+    if args.script is None:
+        main(args.cookbook, args.journal)
+    else:
+        journal = SessionJournal(args.journal)
+        if args.script == '-':
+            sys.exit(run_script(sys.stdin, load_cookbook(args.cookbook),
+                                journal=journal))
+        with open(args.script) as script:
+            sys.exit(run_script(script, load_cookbook(args.cookbook),
+                                journal=journal))
@@ -0,0 +1,137 @@
+"""
+Shared shopping list for CSSE1001 Assignment 1.
+
+Several people can add recipes to, and take ingredients off, the same
+shopping list from different threads. The totals are split into shards by
+ingredient name, each an IngredientAggregate with its own lock, so threads
+working on different ingredients do not wait for each other. A recipe's
+ingredients are parsed before any lock is taken, and the shards it touches
+are locked in shard order, so each recipe is added or removed as a whole
+and two recipes can never deadlock.
+"""
+
+import os
+import threading
+from contextlib import ExitStack
+from a1 import IngredientAggregate, recipe_ingredients
+
+# Shards per CPU when no shard count is given
+SHARDS_PER_CPU = 4
+
+
+class SharedShoppingList():
+    """An IngredientAggregate that many threads can change at once.
+
+    Ingredients are listed in the order they were first added within their
+    shard, rather than overall; display_ingredients and render.py sort by
+    name in any case.
+
+    Attributes:
+        _shards: the IngredientAggregate of each shard
+        _locks: the lock of each shard
+    """
+
+    def __init__(self, convert_units: bool = False,
+                 shards: int | None = None) -> None:
+        """Initialises an empty shopping list.
+
+        Args:
+            convert_units: see IngredientAggregate
+            shards: the number of shards, SHARDS_PER_CPU per CPU by default
+
+        Returns:
+            None
+        """
+        if shards is None:
+            shards = SHARDS_PER_CPU * (os.cpu_count() or 1)
+        self._shards = [IngredientAggregate(convert_units)
+                        for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _shard(self, name: str) -> int:
+        """Returns the shard an ingredient's totals are kept in."""
+        return hash(name) % len(self._shards)
+
+    def add(self, ingredient_details: tuple[float, str, str],
+            scale: float = 1.0) -> None:
+        """Adds an (amount, measure, ingredient) tuple to the totals.
+
+        Examples:
+            >>> shopping_list = SharedShoppingList(shards=4)
+            >>> shopping_list.add((300.0, 'g', 'peanuts'))
+            >>> shopping_list.add((200.0, 'g', 'peanuts'))
+            >>> shopping_list.to_list()
+            [(500.0, 'g', 'peanuts')]
+        """
+        shard = self._shard(ingredient_details[2])
+        with self._locks[shard]:
+            self._shards[shard].add(ingredient_details, scale)
+
+    def subtract(self, ingredient_details: tuple[float, str, str],
+                 scale: float = 1.0) -> None:
+        """Takes an (amount, measure, ingredient) tuple away from the
+        totals, as IngredientAggregate.subtract does.
+        """
+        shard = self._shard(ingredient_details[2])
+        with self._locks[shard]:
+            self._shards[shard].subtract(ingredient_details, scale)
+
+    def add_recipe(self, recipe: tuple[str, str], scale: float = 1.0) -> None:
+        """Adds all of the ingredients of a recipe to the totals at once."""
+        self._apply(recipe, scale, IngredientAggregate.add)
+
+    def remove_recipe(self, recipe: tuple[str, str],
+                      scale: float = 1.0) -> None:
+        """Takes all of the ingredients of a recipe away from the totals at
+        once.
+        """
+        self._apply(recipe, scale, IngredientAggregate.subtract)
+
+    def _apply(self, recipe: tuple[str, str], scale: float, update) -> None:
+        """Applies update to each ingredient of a recipe in its shard, with
+        every shard the recipe touches locked.
+        """
+        by_shard = {}
+        for ingredient_details in recipe_ingredients(recipe):
+            by_shard.setdefault(self._shard(ingredient_details[2]),
+                                []).append(ingredient_details)
+        with self._locked(sorted(by_shard)):
+            for shard, ingredients in by_shard.items():
+                aggregate = self._shards[shard]
+                for ingredient_details in ingredients:
+                    update(aggregate, ingredient_details, scale)
+
+    def _locked(self, shards: list[int]) -> ExitStack:
+        """Returns a context manager holding the locks of the given shards,
+        which must be in ascending order.
+        """
+        stack = ExitStack()
+        for shard in shards:
+            stack.enter_context(self._locks[shard])
+        return stack
+
+    def get_amount(self, name: str) -> tuple[float, str] | None:
+        """Returns the (amount, measure) total of an ingredient, or None if
+        the ingredient has not been added.
+        """
+        shard = self._shard(name)
+        with self._locks[shard]:
+            return self._shards[shard].get_amount(name)
+
+    def to_list(self) -> list[tuple[float, str, str]]:
+        """Returns the totals in the shopping list format, as they were at
+        one moment (every shard is locked while they are read).
+        """
+        with self._locked(range(len(self._shards))):
+            return [ingredient_details for aggregate in self._shards
+                    for ingredient_details in aggregate.to_list()]
+
+    def __len__(self) -> int:
+        with self._locked(range(len(self._shards))):
+            return sum(len(aggregate) for aggregate in self._shards)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get_amount(name) is not None
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.to_list()!r})'
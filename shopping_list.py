@@ -0,0 +1,342 @@
+"""
+Columnar shopping list for CSSE1001 Assignment 1.
+
+A shopping list in a1.py is a list of (amount, measure, ingredient) tuples.
+ShoppingList stores the same information as three typed columns instead:
+a float64 array of amounts and two integer arrays of codes into shared
+string tables of measures and ingredient names.
+"""
+
+import threading
+from array import array
+from itertools import compress
+from units import normalise, to_display_unit
+
+
+class StringTable():
+    """Interns strings to small integer codes.
+
+    Each distinct string is given the next code the first time it is seen
+    and always maps back to the same string object. Strings already in the
+    table are looked up without locking; adding one takes a lock, so two
+    threads adding the same string get the same code.
+
+    Attributes:
+        _codes: a dictionary of string to code
+        _strings: a list of strings, indexed by code
+        _lock: held while a string is added
+    """
+
+    def __init__(self) -> None:
+        """Initialises an empty string table.
+
+        Returns:
+            None
+        """
+        self._codes = {}
+        self._strings = []
+        self._lock = threading.Lock()
+
+    def get_code(self, string: str) -> int:
+        """Returns the code of a string, adding it to the table if needed.
+
+        Examples:
+            >>> table = StringTable()
+            >>> table.get_code('g'), table.get_code('tsp'), table.get_code('g')
+            (0, 1, 0)
+        """
+        code = self._codes.get(string)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(string)
+                if code is None:
+                    code = len(self._strings)
+                    # the string goes in before its code, so any code a
+                    # reader finds can already be looked up
+                    self._strings.append(string)
+                    self._codes[string] = code
+        return code
+
+    def intern(self, string: str) -> str:
+        """Returns the table's copy of a string, adding it if needed, so
+        equal strings share one object.
+
+        Examples:
+            >>> table = StringTable()
+            >>> table.intern('salt') is table.intern(''.join(['sa', 'lt']))
+            True
+        """
+        return self._strings[self.get_code(string)]
+
+    def find_code(self, string: str) -> int | None:
+        """Returns the code of a string, or None if it is not in the table."""
+        return self._codes.get(string)
+
+    def get_string(self, code: int) -> str:
+        """Returns the string with the given code."""
+        return self._strings[code]
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __contains__(self, string: str) -> bool:
+        return string in self._codes
+
+
+# String tables shared by every ShoppingList, so codes can be compared
+# between lists without translating them.
+MEASURES = StringTable()
+INGREDIENTS = StringTable()
+
+
+class ShoppingList():
+    """A shopping list stored as columns, with one row per ingredient.
+
+    Whole list operations (scale, merge, subtract) build new columns in a
+    single pass rather than rebuilding a tuple per ingredient, and each row
+    costs 24 bytes instead of a tuple, a float and two string references.
+
+    Attributes:
+        _amounts: a float64 array of amounts
+        _measures: an integer array of codes into MEASURES
+        _ingredients: an integer array of codes into INGREDIENTS
+        _rows: a dictionary of (ingredient code, measure code) to row
+            number; an ingredient in two measures has two rows
+        _ingredient_rows: a dictionary of ingredient code to the tuple of
+            its row numbers, in order
+    """
+
+    def __init__(self) -> None:
+        """Initialises an empty shopping list.
+
+        Returns:
+            None
+        """
+        self._amounts = array('d')
+        self._measures = array('l')
+        self._ingredients = array('l')
+        self._rows = {}
+        self._ingredient_rows = {}
+
+    @classmethod
+    def from_list(cls, shopping_list: list[tuple[float, str, str]]
+                  ) -> 'ShoppingList':
+        """Returns a ShoppingList of a list of (amount, measure, ingredient)
+        tuples. Amounts of an ingredient that appears more than once in the
+        same measure are combined, as add_to_shopping_list would.
+
+        Examples:
+            >>> columns = ShoppingList.from_list([(300.0, 'g', 'peanuts')])
+            >>> columns.to_list()
+            [(300.0, 'g', 'peanuts')]
+        """
+        result = cls()
+        for amount, measure, ingredient in shopping_list:
+            result._add_row(amount, MEASURES.get_code(measure),
+                            INGREDIENTS.get_code(ingredient))
+        return result
+
+    @classmethod
+    def from_recipes(cls, recipes) -> 'ShoppingList':
+        """Returns the ShoppingList of a list of a1.Recipe objects. The
+        recipes' ingredient codes are totalled directly, without looking up
+        any strings.
+
+        Examples:
+            >>> from a1 import Recipe
+            >>> recipe = Recipe.from_tuple(('toast', '2 slice bread'))
+            >>> ShoppingList.from_recipes([recipe, recipe]).to_list()
+            [(4.0, 'slice', 'bread')]
+        """
+        result = cls()
+        for recipe in recipes:
+            for amount, measure, ingredient in zip(
+                    *recipe.get_ingredient_codes()):
+                result._add_row(amount, measure, ingredient)
+        return result
+
+    def to_list(self) -> list[tuple[float, str, str]]:
+        """Returns the shopping list as (amount, measure, ingredient) tuples,
+        the format used by display_ingredients.
+        """
+        measure = MEASURES.get_string
+        ingredient = INGREDIENTS.get_string
+        return [(amount, measure(m), ingredient(i)) for amount, m, i
+                in zip(self._amounts, self._measures, self._ingredients)]
+
+    def _add_row(self, amount: float, measure: int, ingredient: int) -> None:
+        """Adds an amount of an ingredient, combining it with an existing
+        row for the same ingredient and measure if there is one.
+        """
+        row = self._rows.get((ingredient, measure))
+        if row is None:
+            row = len(self._amounts)
+            self._rows[(ingredient, measure)] = row
+            self._ingredient_rows[ingredient] = \
+                self._ingredient_rows.get(ingredient, ()) + (row,)
+            self._amounts.append(amount)
+            self._measures.append(measure)
+            self._ingredients.append(ingredient)
+        else:
+            self._amounts[row] += amount
+
+    def _copy(self, amounts: array) -> 'ShoppingList':
+        """Returns a list with the same measures and ingredients as this one
+        but the given amounts column.
+        """
+        result = ShoppingList()
+        result._amounts = amounts
+        result._measures = array('l', self._measures)
+        result._ingredients = array('l', self._ingredients)
+        result._rows = dict(self._rows)
+        # the row tuples are never changed, only replaced, so can be shared
+        result._ingredient_rows = dict(self._ingredient_rows)
+        return result
+
+    def get_amount(self, ingredient: str) -> tuple[float, str] | None:
+        """Returns the (amount, measure) of the first row of an ingredient,
+        or None if it is not on the list.
+        """
+        rows = self._ingredient_rows.get(INGREDIENTS.find_code(ingredient))
+        if rows is None:
+            return None
+        row = rows[0]
+        return (self._amounts[row], MEASURES.get_string(self._measures[row]))
+
+    def scale(self, factor: float) -> 'ShoppingList':
+        """Returns a new list with every amount multiplied by factor.
+
+        Examples:
+            >>> columns = ShoppingList.from_list([(300.0, 'g', 'peanuts')])
+            >>> columns.scale(2).to_list()
+            [(600.0, 'g', 'peanuts')]
+        """
+        return self._copy(array('d', [amount * factor
+                                      for amount in self._amounts]))
+
+    def merge(self, other: 'ShoppingList') -> 'ShoppingList':
+        """Returns a new list with the amounts of both lists combined."""
+        result = self._copy(array('d', self._amounts))
+        for amount, measure, ingredient in zip(other._amounts, other._measures,
+                                               other._ingredients):
+            result._add_row(amount, measure, ingredient)
+        return result
+
+    def subtract(self, other: 'ShoppingList') -> 'ShoppingList':
+        """Returns a new list with the amounts of other taken away. Any
+        ingredient with nothing left to buy is dropped from the list.
+        An amount in a different measure to the list's row for the
+        ingredient is converted to the row's measure (see units.py), or
+        ignored if it can not be, e.g. 'large' from 'g'.
+
+        Examples:
+            >>> needed = ShoppingList.from_list([(300.0, 'g', 'peanuts'),
+            ... (1.0, 'tsp', 'salt')])
+            >>> have = ShoppingList.from_list([(100.0, 'g', 'peanuts'),
+            ... (2.0, 'tsp', 'salt')])
+            >>> needed.subtract(have).to_list()
+            [(200.0, 'g', 'peanuts')]
+            >>> needed.subtract(ShoppingList.from_list([(0.1, 'kg', 'peanuts'),
+            ... (1.0, 'large', 'salt')])).to_list()
+            [(200.0, 'g', 'peanuts'), (1.0, 'tsp', 'salt')]
+        """
+        amounts = array('d', self._amounts)
+        rows = self._rows
+        for amount, measure, ingredient in zip(
+                other._amounts, other._measures, other._ingredients):
+            row = rows.get((ingredient, measure))
+            if row is None:
+                row, amount = self._convert_to_row(amount, measure, ingredient)
+            if row is not None:
+                amounts[row] -= amount
+        return self._copy(amounts)._select([amount > 0 for amount in amounts])
+
+    def _convert_to_row(self, amount: float, measure: int, ingredient: int
+                        ) -> tuple[int | None, float]:
+        """Returns the first row of an ingredient whose measure the amount
+        can be converted to, and the converted amount, or (None, amount).
+        """
+        amount, unit = normalise(amount, MEASURES.get_string(measure))
+        for row in self._ingredient_rows.get(ingredient, ()):
+            factor, row_unit = normalise(
+                1.0, MEASURES.get_string(self._measures[row]))
+            if row_unit == unit:
+                return row, amount / factor
+        return None, amount
+
+    def to_canonical_units(self) -> 'ShoppingList':
+        """Returns a new list with every amount converted to the canonical
+        unit of its measure (see units.py), combining the rows of an
+        ingredient measured in compatible units. The conversion is looked
+        up once per distinct measure.
+
+        Examples:
+            >>> columns = ShoppingList.from_list([(1.5, 'kg', 'flour'),
+            ... (2.0, 'tsp', 'salt'), (2.0, 'large', 'banana')])
+            >>> columns.to_canonical_units().to_list()
+            [(1500.0, 'g', 'flour'), (10.0, 'ml', 'salt'), (2.0, 'large', 'banana')]
+            >>> ShoppingList.from_list([(1.0, 'kg', 'flour'),
+            ... (500.0, 'g', 'flour')]).to_canonical_units().to_list()
+            [(1500.0, 'g', 'flour')]
+        """
+        return self._convert_measures(normalise)
+
+    def to_display_units(self) -> 'ShoppingList':
+        """Returns a new list with canonical amounts shown in a sensible
+        unit, e.g. 1500 g as 1.5 kg.
+        """
+        result = ShoppingList()
+        for amount, measure, ingredient in zip(
+                self._amounts, self._measures, self._ingredients):
+            amount, unit = to_display_unit(amount, MEASURES.get_string(measure))
+            result._add_row(amount, MEASURES.get_code(unit), ingredient)
+        return result
+
+    def _convert_measures(self, convert) -> 'ShoppingList':
+        """Returns a new list with each measure replaced and each amount
+        scaled as convert(1.0, measure) says. Rows of an ingredient that end
+        up in the same measure are combined.
+        """
+        conversions = {}
+        for code in set(self._measures):
+            factor, unit = convert(1.0, MEASURES.get_string(code))
+            conversions[code] = (factor, MEASURES.get_code(unit))
+        result = ShoppingList()
+        for amount, measure, ingredient in zip(
+                self._amounts, self._measures, self._ingredients):
+            factor, unit = conversions[measure]
+            result._add_row(amount * factor, unit, ingredient)
+        return result
+
+    def filter(self, predicate) -> 'ShoppingList':
+        """Returns a new list of the rows for which
+        predicate((amount, measure, ingredient)) is True.
+        """
+        return self._select([predicate(row) for row in self.to_list()])
+
+    def _select(self, mask: list[bool]) -> 'ShoppingList':
+        """Returns a new list of the rows where mask is True."""
+        result = ShoppingList()
+        result._amounts = array('d', compress(self._amounts, mask))
+        result._measures = array('l', compress(self._measures, mask))
+        result._ingredients = array('l', compress(self._ingredients, mask))
+        rows = result._rows
+        ingredient_rows = result._ingredient_rows
+        for row, key in enumerate(zip(result._ingredients, result._measures)):
+            rows[key] = row
+            ingredient_rows[key[0]] = ingredient_rows.get(key[0], ()) + (row,)
+        return result
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ShoppingList):
+            return NotImplemented
+        return self.to_list() == other.to_list()
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}.from_list({self.to_list()!r})'
@@ -0,0 +1,100 @@
+"""
+Tests for cookbook_binary: cook books written with write_binary_cookbook and
+opened again with BinaryCookbook.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from a1 import Cookbook, find_recipe, recipe_ingredients
+from benchmark import synthetic_recipes
+from cookbook_binary import BinaryCookbook, write_binary_cookbook
+
+PEANUT_BUTTER = ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')
+TOAST = ('toast', '2 slice bread,10 g butter')
+
+
+class BinaryCookbookTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'cookbook.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _write_and_open(self, recipes) -> BinaryCookbook:
+        write_binary_cookbook(recipes, self._path)
+        cookbook = BinaryCookbook(self._path)
+        self.addCleanup(cookbook.close)
+        return cookbook
+
+    def test_round_trip(self):
+        recipes = synthetic_recipes(500)
+        cookbook = self._write_and_open(recipes)
+        self.assertEqual(len(cookbook), 500)
+        # amounts are stored parsed, so come back as format_amount writes
+        # them ('100' for '100.0'), but parse to the same ingredients
+        self.assertEqual(cookbook.get_names(), [x[0] for x in recipes])
+        for recipe, stored in zip(recipes, cookbook):
+            self.assertEqual(recipe_ingredients(stored),
+                             recipe_ingredients(recipe))
+        for recipe in recipes[::37]:
+            self.assertEqual(cookbook.get_ingredients(recipe[0]),
+                             recipe_ingredients(recipe))
+            self.assertIn(cookbook.get_recipe(recipe[0]), cookbook)
+
+    def test_empty(self):
+        cookbook = self._write_and_open([])
+        self.assertEqual(len(cookbook), 0)
+        self.assertEqual(list(cookbook), [])
+        self.assertEqual(cookbook.get_names(), [])
+        self.assertIsNone(cookbook.get_recipe('toast'))
+        self.assertNotIn('toast', cookbook)
+
+    def test_lookups_that_miss(self):
+        cookbook = self._write_and_open([PEANUT_BUTTER, TOAST])
+        # before the first name, between names, after the last, and a
+        # prefix of a stored name
+        for name in ('apple', 'pie', 'zucchini', 'toas', 'toast ', ''):
+            self.assertIsNone(cookbook.get_recipe(name), name)
+            self.assertIsNone(find_recipe(name, cookbook))
+        self.assertNotIn(('toast', '1 slice bread'), cookbook)
+
+    def test_non_ascii(self):
+        recipes = [('crème brûlée', '250 ml crème fraîche,60 g sucre'),
+                   ('crepe', '1 cup flour'),
+                   ('お好み焼き', '200 g キャベツ'),
+                   ('zürcher geschnetzeltes', '400 g veal')]
+        cookbook = self._write_and_open(recipes)
+        for recipe in recipes:
+            self.assertEqual(cookbook.get_recipe(recipe[0]), recipe)
+        self.assertEqual(cookbook.get_names(), [x[0] for x in recipes])
+        self.assertIsNone(cookbook.get_recipe('creme brulee'))
+
+    def test_duplicate_names_replaced(self):
+        cookbook = self._write_and_open([
+            TOAST, PEANUT_BUTTER, ('toast', '1 slice bread')])
+        self.assertEqual(len(cookbook), 2)
+        self.assertEqual(list(cookbook), list(Cookbook(
+            [TOAST, PEANUT_BUTTER, ('toast', '1 slice bread')])))
+        self.assertEqual(cookbook.get_recipe('toast'),
+                         ('toast', '1 slice bread'))
+
+    def test_bad_ingredient(self):
+        with self.assertRaises(ValueError):
+            write_binary_cookbook([('bad', 'foo bar')], self._path)
+
+    def test_not_a_cookbook(self):
+        with open(self._path, 'wb') as file:
+            file.write(b'not a cook book, just some bytes' * 4)
+        with self.assertRaises(ValueError):
+            BinaryCookbook(self._path)
+        open(self._path, 'wb').close()
+        with self.assertRaises(ValueError):
+            BinaryCookbook(self._path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Tests for cookbook_store.SQLiteCookbook, checked against a1.Cookbook and
+a1.generate_shopping_list.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from a1 import Cookbook, find_recipe, generate_shopping_list, remove_recipe
+from benchmark import synthetic_meal_plan, synthetic_recipes
+from cookbook_store import SQLiteCookbook
+
+PEANUT_BUTTER = ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')
+SALTED_PEANUTS = ('salted peanuts', '200 g peanuts,1 tsp salt')
+TOAST = ('toast', '2 slice bread,10 g butter')
+
+
+class SQLiteCookbookTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'cookbook.sqlite')
+        self._cookbook = SQLiteCookbook(self._path)
+
+    def tearDown(self):
+        self._cookbook.close()
+        shutil.rmtree(self._directory)
+
+    def _ingredient_rows(self) -> int:
+        return self._cookbook._connection.execute(
+            'SELECT COUNT(*) FROM ingredient').fetchone()[0]
+
+    def test_round_trip(self):
+        self._cookbook.extend([PEANUT_BUTTER, TOAST])
+        self._cookbook.close()
+        self._cookbook = SQLiteCookbook(self._path)
+        self.assertEqual(list(self._cookbook), [PEANUT_BUTTER, TOAST])
+        self.assertEqual(find_recipe('toast', self._cookbook), TOAST)
+        self.assertIsNone(find_recipe('brownie', self._cookbook))
+        self.assertIn('toast', self._cookbook)
+        self.assertIn(TOAST, self._cookbook)
+        self.assertNotIn(('toast', '1 slice bread'), self._cookbook)
+
+    def test_replace(self):
+        self._cookbook.extend([PEANUT_BUTTER, TOAST])
+        self._cookbook.append(('peanut butter', '250 g cashews'))
+        self.assertEqual(len(self._cookbook), 2)
+        # replaced in place, as Cookbook does
+        self.assertEqual(self._cookbook.get_names(),
+                         ['peanut butter', 'toast'])
+        self.assertEqual(self._cookbook.get_recipe('peanut butter'),
+                         ('peanut butter', '250 g cashews'))
+        self.assertEqual(self._cookbook.recipes_with('peanuts'), set())
+        self.assertEqual(self._cookbook.recipes_with('cashews'),
+                         {'peanut butter'})
+        self.assertEqual(self._ingredient_rows(), 3)
+
+    def test_remove_cascades(self):
+        self._cookbook.extend([PEANUT_BUTTER, TOAST])
+        self.assertEqual(self._cookbook.remove_name('peanut butter'),
+                         PEANUT_BUTTER)
+        self.assertIsNone(self._cookbook.remove_name('peanut butter'))
+        self.assertEqual(self._ingredient_rows(), 2)
+        self.assertEqual(self._cookbook.recipes_with('salt'), set())
+        remove_recipe('toast', self._cookbook)
+        self.assertEqual((len(self._cookbook), self._ingredient_rows()),
+                         (0, 0))
+        with self.assertRaises(ValueError):
+            self._cookbook.remove(TOAST)
+
+    def test_recipes_with_all(self):
+        self._cookbook.extend([PEANUT_BUTTER, SALTED_PEANUTS, TOAST])
+        self.assertEqual(self._cookbook.recipes_with_all(['peanuts', 'salt']),
+                         {'peanut butter', 'salted peanuts'})
+        self.assertEqual(self._cookbook.recipes_with_all(['peanuts', 'oil']),
+                         {'peanut butter'})
+        self.assertEqual(self._cookbook.recipes_with_all(['peanuts', 'bread']),
+                         set())
+        self.assertEqual(self._cookbook.recipes_with_all([]), set())
+        self.assertEqual(self._cookbook.recipes_with_any(['oil', 'bread']),
+                         {'peanut butter', 'toast'})
+
+    def test_cook_from_pantry_matches_index(self):
+        recipes = synthetic_recipes(200)
+        self._cookbook.extend(recipes)
+        index = Cookbook(recipes).get_index()
+        for pantry in (['ingredient 1', 'ingredient 2', 'ingredient 3'],
+                       [f'ingredient {x}' for x in range(0, 2000, 7)]):
+            self.assertEqual(self._cookbook.cook_from_pantry(pantry, 15),
+                             index.cook_from_pantry(pantry, 15))
+        self.assertEqual(self._cookbook.cook_from_pantry(
+            ['peanuts', 'salt']), [])
+
+    def test_shopping_list_matches_generate_shopping_list(self):
+        recipes = synthetic_recipes(200)
+        self._cookbook.extend(recipes)
+        plan = synthetic_meal_plan(recipes, 1000)
+        totals = self._cookbook.generate_shopping_list(
+            [recipe[0] for recipe in plan])
+        expected = generate_shopping_list(plan)
+        self.assertEqual([row[1:] for row in totals],
+                         [row[1:] for row in expected])
+        for first, second in zip(totals, expected):
+            self.assertAlmostEqual(first[0], second[0])
+
+    def test_shopping_list_ignores_missing_names(self):
+        self._cookbook.extend([PEANUT_BUTTER, TOAST])
+        self.assertEqual(
+            self._cookbook.generate_shopping_list(['toast', 'brownie',
+                                                   'toast']),
+            [(4.0, 'slice', 'bread'), (20.0, 'g', 'butter')])
+        self.assertEqual(self._cookbook.generate_shopping_list([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
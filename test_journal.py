@@ -0,0 +1,210 @@
+"""
+Tests for journal.SessionJournal: undo, and recovery of the meal plan after
+a crash from the journal and snapshot files.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from journal import SessionJournal
+
+PEANUT_BUTTER = ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')
+TOAST = ('toast', '2 slice bread,10 g butter')
+SALTED_PEANUTS = ('salted peanuts', '200 g peanuts,1 tsp salt')
+
+
+def _state(journal: SessionJournal):
+    """Returns the meal plan and shopping list of a journal, rounded so
+    sums made in a different order compare equal.
+    """
+    return (list(journal.recipes),
+            sorted((round(amount, 9), measure, name) for amount, measure, name
+                   in journal.shopping_list.to_list()))
+
+
+def _crash(journal: SessionJournal) -> None:
+    """Leaves a journal as a crashed process would: lines written so far
+    reach the file, but it is never synced or closed.
+    """
+    journal._file.flush()
+    journal._file = None
+
+
+class UndoTest(unittest.TestCase):
+
+    def test_undo_add(self):
+        journal = SessionJournal()
+        journal.add_recipe(PEANUT_BUTTER)
+        journal.add_recipe(TOAST)
+        self.assertTrue(journal.undo())
+        self.assertEqual(journal.recipes, [PEANUT_BUTTER])
+        self.assertEqual(journal.shopping_list.to_list(),
+                         [(300.0, 'g', 'peanuts'), (0.5, 'tsp', 'salt'),
+                          (2.0, 'tsp', 'oil')])
+
+    def test_undo_rm(self):
+        journal = SessionJournal()
+        journal.add_recipe(PEANUT_BUTTER)
+        journal.add_recipe(TOAST)
+        before = _state(journal)
+        journal.remove_recipe('peanut butter')
+        journal.undo()
+        self.assertEqual(_state(journal), before)
+
+    def test_undo_rm_after_rm_i(self):
+        journal = SessionJournal()
+        journal.add_recipe(PEANUT_BUTTER)
+        journal.subtract('peanuts', 100.0)
+        before = _state(journal)
+        journal.remove_recipe('peanut butter')
+        journal.undo()
+        self.assertEqual(_state(journal), before)
+        self.assertEqual(journal.shopping_list.get_amount('peanuts'),
+                         (200.0, 'g'))
+
+    def test_undo_rm_after_ingredient_used_up(self):
+        journal = SessionJournal()
+        journal.add_recipe(PEANUT_BUTTER)
+        journal.subtract('salt', 5.0)
+        before = _state(journal)
+        journal.remove_recipe('peanut butter')
+        journal.undo()
+        self.assertEqual(_state(journal), before)
+
+    def test_undo_rm_i(self):
+        journal = SessionJournal()
+        journal.add_recipe(PEANUT_BUTTER)
+        journal.subtract('peanuts', 1000.0)
+        journal.undo()
+        self.assertEqual(journal.shopping_list.get_amount('peanuts'),
+                         (300.0, 'g'))
+
+    def test_bad_recipe_changes_nothing(self):
+        journal = SessionJournal()
+        journal.add_recipe(TOAST)
+        before = _state(journal)
+        with self.assertRaises(ValueError):
+            journal.add_recipe(('bad', '2 slice bread,foo bar'))
+        self.assertEqual(_state(journal), before)
+        self.assertTrue(journal.undo())
+        self.assertFalse(journal.undo())
+
+    def test_nothing_to_undo(self):
+        journal = SessionJournal()
+        self.assertFalse(journal.undo())
+        journal.add_recipe(TOAST)
+        self.assertTrue(journal.undo())
+        self.assertFalse(journal.undo())
+        self.assertEqual(_state(journal), ([], []))
+
+    def test_undo_everything(self):
+        rng = random.Random(1)
+        journal = SessionJournal()
+        recipes = [PEANUT_BUTTER, TOAST, SALTED_PEANUTS]
+        changes = 0
+        for _ in range(300):
+            choice = rng.random()
+            if choice < 0.5:
+                journal.add_recipe(rng.choice(recipes))
+                changes += 1
+            elif choice < 0.75:
+                if journal.remove_recipe(rng.choice(recipes)[0]) is not None:
+                    changes += 1
+            elif journal.subtract(rng.choice(['peanuts', 'salt', 'bread']),
+                                  rng.random() * 200):
+                changes += 1
+        for _ in range(changes):
+            self.assertTrue(journal.undo())
+        self.assertEqual(_state(journal), ([], []))
+
+
+class RecoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'plan.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _changes(self, journal: SessionJournal) -> None:
+        journal.add_recipe(PEANUT_BUTTER)
+        journal.add_recipe(TOAST)
+        journal.subtract('peanuts', 100.0)
+        journal.add_recipe(SALTED_PEANUTS)
+        journal.remove_recipe('toast')
+        journal.undo()
+        journal.remove_recipe('peanut butter')
+
+    def test_recover_before_snapshot(self):
+        journal = SessionJournal(self._path)
+        self._changes(journal)
+        state = _state(journal)
+        _crash(journal)
+        self.assertFalse(os.path.exists(self._path + '.snapshot'))
+        self.assertEqual(_state(SessionJournal(self._path)), state)
+
+    def test_recover_after_snapshot(self):
+        journal = SessionJournal(self._path, snapshot_every=3)
+        self._changes(journal)
+        state = _state(journal)
+        _crash(journal)
+        self.assertTrue(os.path.exists(self._path + '.snapshot'))
+        recovered = SessionJournal(self._path, snapshot_every=3)
+        self.assertEqual(_state(recovered), state)
+
+    def test_undo_after_recovery(self):
+        journal = SessionJournal(self._path, snapshot_every=4)
+        journal.add_recipe(PEANUT_BUTTER)
+        journal.subtract('peanuts', 100.0)
+        before = _state(journal)
+        journal.remove_recipe('peanut butter')
+        journal.add_recipe(TOAST)
+        _crash(journal)
+        recovered = SessionJournal(self._path, snapshot_every=4)
+        recovered.undo()
+        recovered.undo()
+        self.assertEqual(_state(recovered), before)
+
+    def test_journal_lines_in_snapshot_not_replayed(self):
+        # a crash after the snapshot is renamed into place but before the
+        # journal is emptied leaves lines the snapshot already includes
+        journal = SessionJournal(self._path, snapshot_every=1000)
+        self._changes(journal)
+        state = _state(journal)
+        journal.sync()
+        with open(self._path, encoding='utf-8') as file:
+            lines = file.read()
+        journal.snapshot()
+        _crash(journal)
+        with open(self._path, 'w', encoding='utf-8') as file:
+            file.write(lines)
+        self.assertEqual(_state(SessionJournal(self._path)), state)
+
+    def test_torn_last_line(self):
+        journal = SessionJournal(self._path)
+        self._changes(journal)
+        state = _state(journal)
+        _crash(journal)
+        with open(self._path, 'a', encoding='utf-8') as file:
+            file.write('{"op": "add", "recipe": ["to')
+        recovered = SessionJournal(self._path)
+        self.assertEqual(_state(recovered), state)
+        # later changes are not lost behind the torn line
+        recovered.add_recipe(TOAST)
+        state = _state(recovered)
+        recovered.close()
+        self.assertEqual(_state(SessionJournal(self._path)), state)
+
+    def test_close_and_reopen(self):
+        journal = SessionJournal(self._path, snapshot_every=2)
+        self._changes(journal)
+        state = _state(journal)
+        journal.close()
+        self.assertEqual(_state(SessionJournal(self._path)), state)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Tests for parallel.generate_shopping_list_parallel against the serial
+generate_shopping_list.
+"""
+
+import unittest
+from unittest import mock
+from a1 import generate_shopping_list
+from benchmark import synthetic_meal_plan, synthetic_recipes
+from parallel import generate_shopping_list_parallel
+
+
+class ParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        self._recipes = synthetic_recipes(300)
+        self._plan = synthetic_meal_plan(self._recipes, 3000)
+
+    def test_matches_serial(self):
+        # a low threshold so the plan is really split across workers
+        with mock.patch('parallel.PARALLEL_MIN_RECIPES', 10):
+            self.assertEqual(generate_shopping_list_parallel(self._plan, 3),
+                             generate_shopping_list(self._plan))
+
+    def test_matches_serial_converting_units(self):
+        with mock.patch('parallel.PARALLEL_MIN_RECIPES', 10):
+            parallel = generate_shopping_list_parallel(self._plan, 3, True)
+        serial = generate_shopping_list(self._plan, True)
+        self.assertEqual([row[1:] for row in parallel],
+                         [row[1:] for row in serial])
+        for first, second in zip(parallel, serial):
+            self.assertAlmostEqual(first[0], second[0])
+
+    def test_few_distinct_recipes_run_serially(self):
+        plan = self._recipes[:5] * 10000
+        with mock.patch('parallel.ProcessPoolExecutor') as executor:
+            result = generate_shopping_list_parallel(plan, 4)
+        executor.assert_not_called()
+        self.assertEqual(result, generate_shopping_list(plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
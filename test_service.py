@@ -0,0 +1,133 @@
+"""
+Tests for service.py: requests are sent over a real connection to a server
+started in the same event loop.
+"""
+
+import asyncio
+import json
+import unittest
+from unittest import mock
+from a1 import Cookbook
+from cookbook_store import SQLiteCookbook
+from service import RecipeService, serve
+
+PEANUT_BUTTER = ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')
+
+
+class ServiceTest(unittest.IsolatedAsyncioTestCase):
+
+    def _cookbook(self):
+        return Cookbook([PEANUT_BUTTER])
+
+    async def asyncSetUp(self):
+        self._service = RecipeService(self._cookbook())
+        self._server = await serve(self._service, port=0)
+        port = self._server.sockets[0].getsockname()[1]
+        self._reader, self._writer = await asyncio.open_connection(
+            '127.0.0.1', port)
+
+    async def asyncTearDown(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _request(self, method: str, path: str, payload=None):
+        """Sends a request on the kept-alive connection and returns the
+        status and decoded JSON body of the response.
+        """
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self._writer.write(f'{method} {path} HTTP/1.1\r\n'
+                           f'Host: localhost\r\n'
+                           f'Content-Length: {len(body)}\r\n\r\n'.encode()
+                           + body)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        headers = {}
+        while (line := await self._reader.readline()) != b'\r\n':
+            name, _, value = line.decode().partition(':')
+            headers[name.lower()] = value.strip()
+        length = int(headers['content-length'])
+        return status, json.loads(await self._reader.readexactly(length))
+
+    async def test_recipe_round_trip(self):
+        status, body = await self._request(
+            'POST', '/recipes', {'name': ' Toast ',
+                                 'ingredients': '2 slice bread'})
+        self.assertEqual(status, 201)
+        self.assertEqual(body['name'], 'toast')
+        self.assertEqual(await self._request('GET', '/recipes/Toast'),
+                         (200, {'name': 'toast',
+                                'ingredients': '2 slice bread'}))
+        self.assertEqual(await self._request('GET', '/recipes'),
+                         (200, ['peanut butter', 'toast']))
+        self.assertEqual(await self._request('DELETE', '/recipes/TOAST'),
+                         (200, {'removed': 'toast'}))
+        status, body = await self._request('GET', '/recipes/toast')
+        self.assertEqual(status, 404)
+
+    async def test_shopping_list(self):
+        status, body = await self._request(
+            'POST', '/shopping-list',
+            {'recipes': ['Peanut Butter', 'peanut butter']})
+        self.assertEqual(status, 200)
+        self.assertEqual(body, [[600.0, 'g', 'peanuts'], [1.0, 'tsp', 'salt'],
+                                [4.0, 'tsp', 'oil']])
+
+    async def test_shopping_list_cached(self):
+        plan = {'recipes': ['peanut butter', 'peanut butter']}
+        first = await self._request('POST', '/shopping-list', plan)
+        self.assertEqual(await self._request('POST', '/shopping-list', plan),
+                         first)
+        cache = self._service._shopping_lists[False]
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        # a recipe replaced under the same name is a different recipe
+        await self._request('DELETE', '/recipes/peanut%20butter')
+        await self._request('POST', '/recipes',
+                            {'name': 'peanut butter',
+                             'ingredients': '100 g peanuts'})
+        self.assertEqual(await self._request('POST', '/shopping-list', plan),
+                         (200, [[200.0, 'g', 'peanuts']]))
+
+    async def test_find_by_ingredient(self):
+        self.assertEqual(
+            await self._request('GET', '/recipes?ingredients=peanuts,salt'),
+            (200, ['peanut butter']))
+
+    async def test_errors(self):
+        status, body = await self._request(
+            'POST', '/recipes', {'name': 'bad', 'ingredients': 'foo bar'})
+        self.assertEqual(status, 400)
+        status, body = await self._request('POST', '/shopping-list',
+                                           {'recipes': ['brownie']})
+        self.assertEqual(status, 404)
+        status, body = await self._request('PUT', '/recipes')
+        self.assertEqual(status, 405)
+        status, body = await self._request('GET', '/nowhere')
+        self.assertEqual(status, 404)
+
+
+class SQLiteServiceTest(ServiceTest):
+    """The same requests against an SQLite cook book."""
+
+    def _cookbook(self):
+        cookbook = SQLiteCookbook(':memory:')
+        cookbook.append(PEANUT_BUTTER)
+        return cookbook
+
+    async def test_shopping_list_cached(self):
+        # totalled in the database rather than the cache
+        cookbook = self._service._recipe_collection
+        with mock.patch.object(cookbook, 'generate_shopping_list',
+                               wraps=cookbook.generate_shopping_list) as sql:
+            self.assertEqual(await self._request(
+                'POST', '/shopping-list',
+                {'recipes': ['peanut butter', 'Peanut Butter']}),
+                (200, [[600.0, 'g', 'peanuts'], [1.0, 'tsp', 'salt'],
+                       [4.0, 'tsp', 'oil']]))
+        sql.assert_called_once_with(['peanut butter', 'peanut butter'])
+        self.assertEqual(len(self._service._shopping_lists[False]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for the shopping list commands, run as a batch script.
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from a1 import Cookbook, Recipe
+from session import run_script
+
+PEANUT_BUTTER = ('peanut butter', '300 g peanuts,0.5 tsp salt,2 tsp oil')
+
+
+class ScriptTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _run(self, lines: list[str], recipe_collection=None):
+        """Runs a script and returns its exit status, output and errors."""
+        if recipe_collection is None:
+            recipe_collection = Cookbook([PEANUT_BUTTER])
+        stream, errors = io.StringIO(), io.StringIO()
+        status = run_script(lines, recipe_collection, stream, errors)
+        return status, stream.getvalue(), errors.getvalue()
+
+    def test_imported_names_can_be_added(self):
+        filename = os.path.join(self._directory, 'recipes.csv')
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write('name,ingredients\n'
+                       'Toast,"2 slice bread,10 g butter"\n')
+        status, output, errors = self._run([f'import {filename}',
+                                            'add Toast', 'add toast', 'ls'])
+        self.assertEqual((status, errors), (0, ''))
+        self.assertIn("[('toast', '2 slice bread,10 g butter'), "
+                      "('toast', '2 slice bread,10 g butter')]", output)
+
+    def test_imported_recipes_are_held_as_codes(self):
+        filename = os.path.join(self._directory, 'recipes.jsonl')
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write('{"name": "Toast", "ingredients": '
+                       '["2 slice bread", "10 g butter"]}\n')
+        cookbook = Cookbook([PEANUT_BUTTER])
+        status, output, errors = self._run([f'import {filename}',
+                                            'find butter, bread'], cookbook)
+        self.assertEqual((status, errors), (0, ''))
+        self.assertIn('toast', output)
+        self.assertTrue(all(isinstance(x, Recipe) for x in cookbook))
+        self.assertEqual(cookbook.get_recipe('toast'),
+                         ('toast', '2 slice bread,10 g butter'))
+
+    def test_mkrec_names_can_be_added_and_removed(self):
+        status, output, errors = self._run([
+            'mkrec', 'My  Tea', '1 bag tea', '', 'add my tea', 'rm MY TEA',
+            'ls'])
+        self.assertEqual((status, errors), (0, ''))
+        self.assertIn('No recipe in meal plan yet.', output)
+
+    def test_bad_commands_are_reported(self):
+        status, output, errors = self._run([
+            'mkrec', 'bad', 'foo bar', '', 'add bad', 'add peanut butter',
+            'ls'])
+        self.assertEqual(status, 1)
+        self.assertIn("bad ingredient 'foo bar'", errors)
+        self.assertIn("no recipe 'bad'", errors)
+        self.assertIn('peanut butter', output)
+
+    def test_plain_list_cook_book(self):
+        status, output, errors = self._run(
+            ['add peanut buter', 'find peanuts', 'cook salt'], [PEANUT_BUTTER])
+        self.assertEqual(status, 1)
+        self.assertIn('Did you mean: peanut butter?', output)
+        self.assertIn('peanut butter (uses 1, needs 2 more)', output)
+
+
+class EntryPointTest(unittest.TestCase):
+
+    def test_a1_runs_session(self):
+        # a1.py hands over to session.py, which imports it as a1, so the
+        # journal's IngredientAggregate is the one the session's a1 uses
+        directory = os.path.dirname(os.path.abspath(__file__))
+        result = subprocess.run(
+            [sys.executable, os.path.join(directory, 'a1.py'), '--script',
+             '-'], input='add peanut butter\nrm -i peanuts 100\nls -s csv\n',
+            capture_output=True, text=True, cwd=directory)
+        self.assertEqual((result.returncode, result.stderr), (0, ''))
+        self.assertIn('200.0,g,peanuts', result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
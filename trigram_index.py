@@ -0,0 +1,126 @@
+"""
+Fuzzy name lookup for CSSE1001 Assignment 1.
+
+TrigramIndex maps every three character piece of a name to the names that
+contain it. A misspelt name still shares most of its trigrams with the name
+that was meant, so the closest names can be found by counting shared
+trigrams over a few posting lists rather than comparing against every name.
+"""
+
+import heapq
+from collections import Counter
+
+# Trigrams found in more names than this are only used if the query has no
+# rarer trigrams; they say little about which name was meant
+COMMON_POSTING_LIMIT = 5000
+
+# How many candidates per result are rescored exactly
+CANDIDATES_PER_RESULT = 10
+
+# Names scoring below this are not suggested
+MIN_SIMILARITY = 0.3
+
+
+def get_trigrams(name: str) -> set[str]:
+    """
+    Return the trigrams of a name, padded so the start and end of the name
+    count for more.
+
+    >>> sorted(get_trigrams('Pie'))
+    ['  p', ' pi', 'ie ', 'pie']
+    """
+    padded = '  ' + name.lower() + ' '
+    return {padded[x:x + 3] for x in range(len(padded) - 2)}
+
+
+def similarity(first: set[str], second: set[str]) -> float:
+    """Return the Dice coefficient of two sets of trigrams, from 0 to 1."""
+    if not first and not second:
+        return 1.0
+    return 2 * len(first & second) / (len(first) + len(second))
+
+
+class TrigramIndex():
+    """An index of names by their character trigrams.
+
+    Attributes:
+        _postings: a dictionary of trigram to the set of ids of names with it
+        _names: a dictionary of id to name
+        _ids: a dictionary of name to id
+        _next_id: the id to give the next name added
+    """
+
+    def __init__(self, names: list[str] | None = None) -> None:
+        """Initialises the index with the given names, if any.
+
+        Args:
+            names: names to index
+
+        Returns:
+            None
+        """
+        self._postings = {}
+        self._names = {}
+        self._ids = {}
+        self._next_id = 0
+        if names is not None:
+            for name in names:
+                self.add(name)
+
+    def add(self, name: str) -> None:
+        """Adds a name to the index, if it is not already indexed."""
+        if name in self._ids:
+            return
+        name_id = self._next_id
+        self._next_id += 1
+        self._ids[name] = name_id
+        self._names[name_id] = name
+        for trigram in get_trigrams(name):
+            self._postings.setdefault(trigram, set()).add(name_id)
+
+    def remove(self, name: str) -> None:
+        """Removes a name from the index, if it is indexed."""
+        name_id = self._ids.pop(name, None)
+        if name_id is None:
+            return
+        del self._names[name_id]
+        for trigram in get_trigrams(name):
+            posting = self._postings[trigram]
+            posting.discard(name_id)
+            if not posting:
+                del self._postings[trigram]
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[str, float]]:
+        """Returns up to limit of the names most like query, most similar
+        first, with their similarity from 0 to 1.
+
+        Examples:
+            >>> index = TrigramIndex(['peanut butter', 'brownie', 'seitan'])
+            >>> [name for name, score in index.search('penut buter')]
+            ['peanut butter']
+        """
+        query_trigrams = get_trigrams(query)
+        postings = sorted((self._postings[x] for x in query_trigrams
+                           if x in self._postings), key=len)
+        if not postings:
+            return []
+        counts = Counter()
+        for posting in postings:
+            if len(posting) > COMMON_POSTING_LIMIT and counts:
+                break
+            counts.update(posting)
+        candidates = heapq.nlargest(limit * CANDIDATES_PER_RESULT,
+                                    counts.items(), key=lambda x: x[1])
+        scored = []
+        for name_id, count in candidates:
+            name = self._names[name_id]
+            score = similarity(query_trigrams, get_trigrams(name))
+            if score >= MIN_SIMILARITY:
+                scored.append((name, score))
+        return heapq.nsmallest(limit, scored, key=lambda x: (-x[1], x[0]))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
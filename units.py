@@ -0,0 +1,129 @@
+"""
+Unit conversion tables for CSSE1001 Assignment 1 shopping lists.
+
+Every known measure belongs to a dimension (mass, volume or count) and has a
+precomputed factor to that dimension's canonical unit, so normalising an
+amount is one dictionary lookup and one multiplication. Measures that are not
+in the tables ('large', 'pitted', ...) are left as they are.
+Volumes use Australian metric kitchen measures.
+"""
+
+MASS = 'mass'
+VOLUME = 'volume'
+COUNT = 'count'
+
+# Canonical unit of each dimension; amounts are summed in these units
+CANONICAL_UNITS = {
+    MASS: 'g',
+    VOLUME: 'ml',
+    COUNT: 'whole',
+}
+
+# Size of each unit in its dimension's canonical unit
+_UNIT_SIZES = {
+    MASS: {
+        'mg': 0.001,
+        'g': 1.0,
+        'kg': 1000.0,
+        'oz': 28.349523125,
+        'lb': 453.59237,
+    },
+    VOLUME: {
+        'ml': 1.0,
+        'l': 1000.0,
+        'tsp': 5.0,
+        'tbsp': 20.0,
+        'cup': 250.0,
+    },
+    COUNT: {
+        'whole': 1.0,
+        'dozen': 12.0,
+    },
+}
+
+# Other spellings of the units above
+_ALIASES = {
+    'gram': 'g', 'grams': 'g', 'kilogram': 'kg', 'kilograms': 'kg',
+    'milligram': 'mg', 'milligrams': 'mg', 'ounce': 'oz', 'ounces': 'oz',
+    'pound': 'lb', 'pounds': 'lb', 'lbs': 'lb',
+    'millilitre': 'ml', 'millilitres': 'ml', 'milliliter': 'ml',
+    'milliliters': 'ml', 'litre': 'l', 'litres': 'l', 'liter': 'l',
+    'liters': 'l', 'teaspoon': 'tsp', 'teaspoons': 'tsp',
+    'tablespoon': 'tbsp', 'tablespoons': 'tbsp', 'cups': 'cup',
+    'each': 'whole', 'piece': 'whole', 'pieces': 'whole',
+}
+
+# measure -> (dimension, factor to the canonical unit), built once at import
+UNIT_FACTORS = {
+    unit: (dimension, size)
+    for dimension, sizes in _UNIT_SIZES.items()
+    for unit, size in sizes.items()
+}
+UNIT_FACTORS.update({
+    alias: UNIT_FACTORS[unit] for alias, unit in _ALIASES.items()
+})
+
+# Units an amount may be displayed in, largest first. An amount is shown in
+# the largest unit it has at least one of, or the last unit if it has none.
+DISPLAY_UNITS = {
+    MASS: [('kg', 1000.0), ('g', 1.0)],
+    VOLUME: [('l', 1000.0), ('cup', 250.0), ('tbsp', 20.0), ('tsp', 5.0)],
+    COUNT: [('whole', 1.0)],
+}
+
+# Decimal places kept when converting back to a display unit, to hide
+# floating point noise such as 1.5000000000000002
+DISPLAY_PRECISION = 6
+
+
+def get_dimension(measure: str) -> str | None:
+    """
+    Return the dimension of a measure, or None if it is not a known unit.
+
+    >>> get_dimension('tbsp')
+    'volume'
+    >>> print(get_dimension('large'))
+    None
+    """
+    factor = UNIT_FACTORS.get(measure.lower())
+    return None if factor is None else factor[0]
+
+
+def normalise(amount: float, measure: str) -> tuple[float, str]:
+    """
+    Return the amount and measure in the canonical unit of the measure's
+    dimension. Unknown measures are returned unchanged.
+
+    >>> normalise(1.5, 'kg')
+    (1500.0, 'g')
+    >>> normalise(2.0, 'tsp')
+    (10.0, 'ml')
+    >>> normalise(2.0, 'large')
+    (2.0, 'large')
+    """
+    factor = UNIT_FACTORS.get(measure.lower())
+    if factor is None:
+        return amount, measure
+    return amount * factor[1], CANONICAL_UNITS[factor[0]]
+
+
+def to_display_unit(amount: float, measure: str) -> tuple[float, str]:
+    """
+    Return a canonical amount and measure in a sensible unit for display.
+    Measures that are not canonical units are returned unchanged.
+
+    >>> to_display_unit(1500.0, 'g')
+    (1.5, 'kg')
+    >>> to_display_unit(7.5, 'ml')
+    (1.5, 'tsp')
+    >>> to_display_unit(2.5, 'ml')
+    (0.5, 'tsp')
+    """
+    factor = UNIT_FACTORS.get(measure)
+    if factor is None or CANONICAL_UNITS[factor[0]] != measure:
+        return amount, measure
+    units = DISPLAY_UNITS[factor[0]]
+    for unit, size in units:
+        if abs(amount) >= size:
+            break
+    return round(amount / size, DISPLAY_PRECISION), unit